@@ -9,68 +9,92 @@ import streamlit as st
 st.set_page_config(page_title="Upload & Export", layout="wide")
 
 from auth import restrict_access
-from utils import load_user_data, save_user_data, filter_and_clean_data, get_transactions
+from utils import (
+    load_user_data, save_user_data, filter_and_clean_data, get_transactions,
+    restore_upload_metadata, fillna_text, set_transactions, write_user_frame
+)
 import pandas as pd
+from pandas.api.types import union_categoricals
 import logging
 import os
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
 from datetime import datetime
 import json
 import io
 import re
+import functools
+import hashlib
+import importlib.util
 
-# Try to import PDF processing libraries
-try:
-    import pdfplumber
-    import tabula
-    PDF_PROCESSING_AVAILABLE = True
-    logging.info("PDF processing libraries loaded successfully")
-except ImportError as e:
-    PDF_PROCESSING_AVAILABLE = False
-    logging.error(f"PDF processing libraries import error: {e}")
+# PDF, profiling and fuzzy matching libraries are only imported by the code paths that use them,
+# so a plain CSV upload doesn't pay for tabula's JVM bridge or ydata-profiling's dependency tree
+MISSING_PDF_LIBRARIES = [
+    module for module in ("pdfplumber", "tabula")
+    if importlib.util.find_spec(module) is None
+]
+PDF_PROCESSING_AVAILABLE = not MISSING_PDF_LIBRARIES
+if MISSING_PDF_LIBRARIES:
+    logging.error(f"PDF processing libraries not installed: {', '.join(MISSING_PDF_LIBRARIES)}")
+
+# ydata-profiling alone pulls in scipy, matplotlib and seaborn
+PROFILING_AVAILABLE = any(
+    importlib.util.find_spec(module) is not None
+    for module in ("ydata_profiling", "pandas_profiling", "sweetviz")
+)
+
+FUZZY_MATCHING_AVAILABLE = importlib.util.find_spec("rapidfuzz") is not None
+
+# Patterns used to parse bank statement lines extracted from PDFs
+DATE_RE = re.compile(r'(\d{1,2}[\s/-][A-Za-z]{3,9}[\s/-]\d{2,4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[/-]\d{1,2}|\b\w{3}\s\d{1,2}\b)')
+AMOUNT_RE = re.compile(r'[\d,]+\.\d{2}')
+INCOME_RE = re.compile(r'(?:received|deposit|credit|salary|income|refund|transfer\s+in)', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Standard column names and the lowercase header aliases that map onto them
+DESIRED_COLUMNS = {
+    "Amount": ["amount", "sum", "price", "cost", "total", "payment", "value", "expense"],
+    "Name": ["name", "merchant", "vendor", "store", "description", "desc", "transaction", "details", "item"],
+    "Date": ["date", "time", "day", "when", "timestamp"],
+    "Category": ["category", "cat", "type", "group", "label", "classification"]
+}
+ALIAS_TO_STD = {alias: std_col for std_col, aliases in DESIRED_COLUMNS.items() for alias in aliases}
+
+def flatten_aliases(desired_columns):
+    """
+    Flatten a standard column -> aliases mapping for batch fuzzy matching.
+    Standard columns without aliases are left out so every group is non-empty.
     
-    # Try to import them individually to provide better error messages
-    try:
-        import pdfplumber
-        logging.info("pdfplumber loaded successfully")
-    except ImportError as e:
-        logging.error(f"pdfplumber import error: {e}")
+    Args:
+        desired_columns (dict): Standard column name -> list of lowercase aliases
     
-    try:
-        import tabula
-        logging.info("tabula loaded successfully")
-    except ImportError as e:
-        logging.error(f"tabula import error: {e}")
-
-# Improved profiling module imports with better fallback
-PROFILING_AVAILABLE = None
-try:
-    from ydata_profiling import ProfileReport
-    PROFILING_AVAILABLE = "ydata"
-    st.success("✅ ydata-profiling loaded")
-except ImportError:
-    try:
-        from pandas_profiling import ProfileReport
-        PROFILING_AVAILABLE = "pandas"
-        st.success("✅ pandas-profiling loaded")
-    except ImportError:
-        try:
-            import sweetviz
-            PROFILING_AVAILABLE = "sweetviz"
-            st.success("✅ sweetviz loaded")
-        except ImportError:
-            PROFILING_AVAILABLE = None
-            st.warning("For enhanced data profiling, install one of the following packages:", icon="⚠️")
-            st.code("pip install ydata-profiling", language="bash")
-            st.code("pip install pandas-profiling", language="bash")
-            st.code("pip install sweetviz", language="bash")
-
-try:
-    from rapidfuzz import process, fuzz
-    FUZZY_MATCHING_AVAILABLE = True
-except ImportError:
-    FUZZY_MATCHING_AVAILABLE = False
-    st.warning("Install 'rapidfuzz' for better column matching: `pip install rapidfuzz`", icon="⚠️")
+    Returns:
+        tuple: Standard column names, flat alias list, and the index where each column's aliases start
+    """
+    std_cols = [std_col for std_col, aliases in desired_columns.items() if aliases]
+    aliases = [alias for std_col in std_cols for alias in desired_columns[std_col]]
+    offsets = np.cumsum([0] + [len(desired_columns[std_col]) for std_col in std_cols[:-1]])
+    return std_cols, aliases, offsets
+
+# Built once so fuzzy matching against the standard aliases doesn't rebuild it for every upload
+STD_ALIAS_INDEX = flatten_aliases(DESIRED_COLUMNS)
+
+# Uploads larger than this (in MB) trigger a warning and, for CSV/TXT/Parquet, chunked processing
+LARGE_FILE_MB = 50
+CHUNK_ROWS = 100_000
+
+# Rows of the duplicate report rendered in the page; the downloadable report has them all
+DUPLICATE_PREVIEW_ROWS = 200
+
+# Number of PDF pages whose text is parsed together before it is released
+PDF_PAGES_PER_CHUNK = 50
+
+# Use the Rust-based calamine reader for Excel files when installed; otherwise let pandas pick (openpyxl/xlrd)
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") is not None else None
 
 logging.basicConfig(
     filename="upload.log",
@@ -115,20 +139,11 @@ if "demo_active" not in st.session_state:
 if "transactions" not in st.session_state or st.session_state["transactions"].empty:
     user_data = load_user_data(username)
     if not user_data.empty:
-        st.session_state["transactions"] = user_data.copy()
+        set_transactions(user_data)
         
         # Also restore metadata if available
-        metadata_file = os.path.join("user_data", f"{username}_metadata.json")
         try:
-            if os.path.exists(metadata_file):
-                with open(metadata_file, "r") as f:
-                    metadata = json.load(f)
-                    if "last_upload_filename" in metadata:
-                        st.session_state["uploaded_file_name"] = metadata["last_upload_filename"]
-                    if "last_upload_timestamp" in metadata:
-                        st.session_state["upload_timestamp"] = metadata["last_upload_timestamp"]
-                    if "upload_history" in metadata:
-                        st.session_state["upload_history"] = metadata["upload_history"]
+            if restore_upload_metadata(username):
                 st.success("Successfully loaded your saved data!")
         except Exception as e:
             logging.error(f"Error loading metadata: {e}")
@@ -184,6 +199,97 @@ with st.expander("ℹ️ Upload Instructions"):
 
 st.divider()
 
+def name_like_c_parser(columns):
+    """
+    Name blank and repeated headers the way pandas' C parser does ("Unnamed: 2", "Amount.1"),
+    so the pyarrow and chunked read paths hand standardize_transactions the same columns.
+    
+    Args:
+        columns: Header names as read by the pyarrow engine
+    
+    Returns:
+        list: Column names with blanks and duplicates renamed
+    """
+    names = [f"Unnamed: {i}" if col == "" else col for i, col in enumerate(columns)]
+    header = set(names)
+    counts = {}
+    for i, name in enumerate(names):
+        col = name
+        count = counts.get(col, 0)
+        while count > 0:
+            counts[name] = count + 1
+            col = f"{name}.{count}"
+            # Skip suffixes another header already uses
+            count = count + 1 if col in header else counts.get(col, 0)
+        names[i] = col
+        counts[col] = count + 1
+    return names
+
+def read_csv_fast(source, **kwargs):
+    """
+    Read a CSV with pyarrow's multithreaded parser, falling back to the default C parser
+    for files or options the pyarrow engine can't handle.
+    
+    Args:
+        source: File path or file-like object
+        **kwargs: Extra arguments passed to pd.read_csv
+    
+    Returns:
+        DataFrame: The parsed data
+    """
+    try:
+        data = pd.read_csv(source, engine="pyarrow", **kwargs)
+        data.columns = name_like_c_parser(data.columns)
+        return data
+    except (ValueError, pa.ArrowException) as e:
+        logging.info(f"pyarrow CSV parser failed, using default parser: {e}")
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return pd.read_csv(source, **kwargs)
+
+def read_json_fast(source):
+    """
+    Read a JSON file with pyarrow's multithreaded reader when it holds one record per line,
+    falling back to pd.read_json for the layouts Arrow can't read (record arrays, column dicts).
+    
+    Args:
+        source: File-like object with the file contents
+    
+    Returns:
+        DataFrame: The parsed data
+    """
+    try:
+        table = pajson.read_json(source)
+        # A pandas-style column or index dict parses as a single row of lists or structs
+        if not (table.num_rows == 1 and any(pa.types.is_nested(field.type) for field in table.schema)):
+            return table.to_pandas()
+    except pa.ArrowException as e:
+        logging.info(f"pyarrow JSON reader failed, using pandas: {e}")
+    source.seek(0)
+    return pd.read_json(source)
+
+@st.cache_data(show_spinner=False)
+def read_sample_transactions(sample_path, modified_time):
+    """
+    Read and clean the sample transaction file.
+    Cached on the path and modification time so reruns skip the read and cleaning.
+    """
+    data = read_csv_fast(sample_path)
+    
+    # Ensure all required columns exist
+    if "Type" not in data.columns:
+        # Add Type column with "Expense" as default
+        data["Type"] = "Expense"
+        
+        # Add some income transactions for better demo visualization
+        # Set every tenth transaction (at least 3) as income, so the demo is the same on every load
+        income_count = min(len(data), max(3, int(len(data) * 0.1)))
+        step = max(1, len(data) // income_count) if income_count else 1
+        data.loc[data.index[::step][:income_count], "Type"] = "Income"
+    
+    # Perform the same processing as with uploaded files
+    return filter_and_clean_data(data)
+
 def load_sample_data():
     """Load the sample transaction data for demo purposes."""
     try:
@@ -194,27 +300,10 @@ def load_sample_data():
             sample_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sample_data", "sample_transactions.csv")
         
         if os.path.exists(sample_path):
-            data = pd.read_csv(sample_path)
-            
-            # Ensure all required columns exist
-            if "Type" not in data.columns:
-                # Add Type column with "Expense" as default
-                data["Type"] = "Expense"
-                
-                # Add some income transactions for better demo visualization
-                # Set 10% of transactions as income
-                income_count = max(3, int(len(data) * 0.1))
-                income_indices = np.random.choice(data.index, income_count, replace=False)
-                data.loc[income_indices, "Type"] = "Income"
-            
-            # Perform the same processing as with uploaded files
-            data = filter_and_clean_data(data)
+            data = read_sample_transactions(sample_path, os.path.getmtime(sample_path))
             
-            # Make sure we have the correct count by forcing a copy
-            processed_data = data.copy()
-            
-            # Explicitly set the session state variables
-            st.session_state["transactions"] = processed_data
+            # Explicitly set the session state variables; the cached read already returns a fresh DataFrame
+            set_transactions(data)
             st.session_state["uploaded_file_name"] = "Sample_Transactions.csv"
             st.session_state["upload_timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
@@ -224,8 +313,8 @@ def load_sample_data():
             upload_metadata = {
                 "filename": "Sample_Transactions.csv (Demo)",
                 "timestamp": st.session_state["upload_timestamp"],
-                "row_count": len(processed_data),
-                "column_count": len(processed_data.columns)
+                "row_count": len(data),
+                "column_count": len(data.columns)
             }
             
             # Add to history and limit to 10 entries
@@ -240,11 +329,11 @@ def load_sample_data():
                     "last_upload_timestamp": st.session_state["upload_timestamp"],
                     "upload_history": st.session_state["upload_history"]
                 }
-                save_user_data(username, processed_data, metadata)
+                save_user_data(username, data, metadata)
                 logging.info(f"Saved demo data to user account: {username}")
             
             # Just return the data - don't render UI elements here
-            return processed_data
+            return data
         else:
             st.error("Sample data file not found. Please contact the administrator.")
             logging.error(f"Sample file not found at {sample_path}")
@@ -254,16 +343,50 @@ def load_sample_data():
         logging.error(f"Error loading sample data: {e}")
         return pd.DataFrame()
 
-def fuzzy_column_match(col_name, possible_targets, threshold=70):
-    """Use fuzzy matching to find the best match for a column name."""
+def batch_fuzzy_column_match(col_names, desired_columns, threshold=70):
+    """
+    Map column names to standard columns, scoring every column against every alias at once.
+    A column maps to the first standard column with an alias scoring at least the threshold.
+    
+    Args:
+        col_names (list): Column names to map
+        desired_columns (dict): Standard column name -> list of lowercase aliases
+        threshold (int): Fuzzy matching threshold (0-100)
+        
+    Returns:
+        dict: Column name -> standard column name, or the column itself when nothing matches
+    """
+    lowered = [str(col).lower() for col in col_names]
+    if desired_columns is DESIRED_COLUMNS:
+        std_cols, aliases, offsets = STD_ALIAS_INDEX
+    else:
+        std_cols, aliases, offsets = flatten_aliases(desired_columns)
+    
     if not FUZZY_MATCHING_AVAILABLE:
-        for target in possible_targets:
-            if target in col_name.lower():
-                return target
-        return None
+        col_map = {}
+        for col, lc in zip(col_names, lowered):
+            col_map[col] = next(
+                (std_col for std_col in std_cols if any(alias in lc for alias in desired_columns[std_col])),
+                col
+            )
+        return col_map
     
-    match, score, _ = process.extractOne(col_name.lower(), possible_targets)
-    return match if score >= threshold else None
+    if not std_cols:
+        return {col: col for col in col_names}
+    
+    from rapidfuzz import process, fuzz
+    
+    # Scores under the cutoff come back as 0, which lets rapidfuzz skip work on hopeless pairs
+    scores = process.cdist(lowered, aliases, scorer=fuzz.WRatio, score_cutoff=threshold, workers=-1)
+    
+    # Best alias score per (column, standard column), then the first standard column over the threshold
+    group_best = np.maximum.reduceat(scores, offsets, axis=1)
+    matched = group_best >= threshold
+    first_match = matched.argmax(axis=1)
+    return {
+        col: std_cols[first_match[i]] if matched[i].any() else col
+        for i, col in enumerate(col_names)
+    }
 
 def detect_duplicate_transactions(data, threshold=80):
     """
@@ -279,9 +402,7 @@ def detect_duplicate_transactions(data, threshold=80):
     if not FUZZY_MATCHING_AVAILABLE or len(data) < 2:
         return pd.DataFrame()
     
-    data['amount_str'] = data['Amount'].astype(str)
-    
-    potential_duplicates = []
+    from rapidfuzz import process, fuzz
     
     max_rows_to_check = 1000
     if len(data) > max_rows_to_check:
@@ -289,46 +410,105 @@ def detect_duplicate_transactions(data, threshold=80):
         check_data = data.head(max_rows_to_check)
     else:
         check_data = data
-    
-    for i, row1 in check_data.iterrows():
-        fingerprint1 = f"{row1['Name']} {row1['amount_str']}"
-        
-        for j, row2 in check_data.iterrows():
-            if i >= j:
-                continue
-                
-            fingerprint2 = f"{row2['Name']} {row2['amount_str']}"
-            
-            similarity = fuzz.ratio(fingerprint1.lower(), fingerprint2.lower())
-            
-            if similarity >= threshold:
-                potential_duplicates.append({
-                    'Index1': i,
-                    'Index2': j,
-                    'Transaction1': fingerprint1,
-                    'Transaction2': fingerprint2,
-                    'Similarity': similarity,
-                    'Date1': row1.get('Date', 'Unknown'),
-                    'Date2': row2.get('Date', 'Unknown')
-                })
-    
-    if potential_duplicates:
-        dup_df = pd.DataFrame(potential_duplicates)
-        return dup_df.sort_values('Similarity', ascending=False)
-    
-    return pd.DataFrame()
+
+    # Build the fingerprints locally so the caller's DataFrame is left untouched.
+    # Newer pandas keeps missing values as NaN through astype(str), so blank them before concatenating
+    fingerprints = (
+        check_data['Name'].astype(str).fillna('') + ' ' + check_data['Amount'].astype(str).fillna('')
+    ).to_numpy()
+    lowered = [fingerprint.lower() for fingerprint in fingerprints]
+
+    # Block on the rounded amount: only transactions in the same or the next amount bucket are compared,
+    # so amounts on either side of a rounding boundary still meet
+    buckets = pd.to_numeric(check_data['Amount'], errors='coerce').fillna(0).round(0).astype(np.int64)
+    positions = pd.Series(np.arange(len(check_data))).groupby(buckets.to_numpy()).indices
+    no_rows = np.empty(0, dtype=np.intp)
+
+    pair_rows, pair_cols, pair_scores = [], [], []
+    for bucket, idxs in positions.items():
+        candidates = np.concatenate([idxs, positions.get(bucket + 1, no_rows)])
+        if len(candidates) < 2:
+            continue
+
+        # Pairs below the threshold come back as 0
+        scores = process.cdist([lowered[i] for i in idxs], [lowered[i] for i in candidates],
+                               scorer=fuzz.ratio, score_cutoff=threshold, dtype=np.float64, workers=-1)
+        matches = scores >= threshold
+        # Within the bucket each pair only needs reporting once, so keep the upper triangle
+        matches[:, :len(idxs)] = np.triu(matches[:, :len(idxs)], k=1)
+
+        local_rows, local_cols = np.nonzero(matches)
+        pair_rows.append(idxs[local_rows])
+        pair_cols.append(candidates[local_cols])
+        pair_scores.append(scores[local_rows, local_cols])
+
+    if not pair_rows or sum(len(r) for r in pair_rows) == 0:
+        return pd.DataFrame()
+
+    first, second = np.concatenate(pair_rows), np.concatenate(pair_cols)
+    rows, cols = np.minimum(first, second), np.maximum(first, second)
+    similarity = np.concatenate(pair_scores)
+    order = np.lexsort((cols, rows))
+    rows, cols, similarity = rows[order], cols[order], similarity[order]
+
+    if 'Date' in check_data.columns:
+        dates = check_data['Date'].to_numpy()
+    else:
+        dates = np.full(len(check_data), 'Unknown', dtype=object)
+
+    dup_df = pd.DataFrame({
+        'Index1': check_data.index[rows],
+        'Index2': check_data.index[cols],
+        'Transaction1': fingerprints[rows],
+        'Transaction2': fingerprints[cols],
+        'Similarity': similarity,
+        'Date1': dates[rows],
+        'Date2': dates[cols]
+    })
+    return dup_df.sort_values('Similarity', ascending=False)
+
+@functools.lru_cache(maxsize=None)
+def _get_profiler():
+    """
+    Import the first available profiling library.
+    Returns a (name, backend) tuple, or None if no library is installed.
+    """
+    try:
+        from ydata_profiling import ProfileReport
+        return "ydata", ProfileReport
+    except ImportError:
+        pass
+    try:
+        from pandas_profiling import ProfileReport
+        return "pandas", ProfileReport
+    except ImportError:
+        pass
+    try:
+        import sweetviz
+        return "sweetviz", sweetviz
+    except ImportError:
+        return None
+
+def show_profiling_install_hint():
+    """Explain how to enable data profiling when no profiling library is installed."""
+    st.warning("For enhanced data profiling, install one of the following packages:", icon="⚠️")
+    st.code("pip install ydata-profiling", language="bash")
+    st.code("pip install pandas-profiling", language="bash")
+    st.code("pip install sweetviz", language="bash")
 
 def generate_data_profile(data):
     """Generate an interactive data profile report using available profiling library."""
-    if not PROFILING_AVAILABLE:
+    profiler = _get_profiler()
+    if profiler is None:
         return None
-    
+
+    profiler_name, backend = profiler
     try:
-        if PROFILING_AVAILABLE == "ydata" or PROFILING_AVAILABLE == "pandas":
-            profile = ProfileReport(data, title="Transaction Data Profile", minimal=True)
+        if profiler_name == "ydata" or profiler_name == "pandas":
+            profile = backend(data, title="Transaction Data Profile", minimal=True)
             return profile.to_html()
-        elif PROFILING_AVAILABLE == "sweetviz":
-            report = sweetviz.analyze(data)
+        elif profiler_name == "sweetviz":
+            report = backend.analyze(data)
             report_path = "transaction_report.html"
             report.show_html(report_path)
             with open(report_path, "r", encoding="utf-8") as f:
@@ -337,6 +517,161 @@ def generate_data_profile(data):
         logging.error(f"Failed to generate data profile: {e}")
         return None
 
+def parse_statement_lines(lines, default_date, skip_balance=True):
+    """
+    Parse raw bank statement lines into transactions in one vectorized pass.
+    Lines that are too short, mention a balance, or contain no amount are skipped.
+
+    Args:
+        lines (list): Text lines extracted from a statement
+        default_date (str): Date (YYYY-MM-DD) for lines that don't contain one
+        skip_balance (bool): Whether to skip lines mentioning a balance
+
+    Returns:
+        tuple: (DataFrame of transactions, list of lines that failed parsing)
+    """
+    lines = pd.Series(lines, dtype=object)
+    # Amounts always have a decimal point, so a plain substring check drops most lines before any regex runs
+    keep = (lines.str.strip().str.len() >= 8) & lines.str.contains(".", regex=False)
+    if skip_balance:
+        keep &= ~lines.str.contains("balance", case=False, regex=False)
+    lines = lines[keep]
+
+    # Use the last number as the amount (common in statements).
+    # Cast back to object: when no line has an amount, .str[-1] gives an all-NaN float Series
+    amount_text = lines.str.findall(AMOUNT_RE).str[-1].astype(object)
+    has_amount = amount_text.notna()
+    lines, amount_text = lines[has_amount], amount_text[has_amount]
+    amounts = pd.to_numeric(amount_text.str.replace(",", "", regex=False), errors="coerce")
+
+    error_log = [
+        {"line": line, "error": f"could not convert string to float: '{amount}'"}
+        for line, amount in zip(lines[amounts.isna()], amount_text[amounts.isna()])
+    ]
+    lines, amounts = lines[amounts.notna()], amounts[amounts.notna()]
+
+    # Use date if found, otherwise the caller's default (today's date)
+    dates = lines.str.extract(DATE_RE, expand=False).fillna(default_date)
+
+    # Extract description by removing amounts and collapsing whitespace
+    descriptions = (
+        lines.str.replace(AMOUNT_RE, "", regex=True)
+        .str.replace(WHITESPACE_RE, " ", regex=True)
+        .str.strip()
+    )
+
+    # Match income keywords with Arrow's native regex kernel rather than Python's re per row
+    is_income = pc.match_substring_regex(
+        pa.array(descriptions, type=pa.string()), INCOME_RE.pattern, ignore_case=True
+    ).fill_null(False)
+
+    transactions = pd.DataFrame({
+        "Date": dates,
+        "Name": descriptions,
+        "Amount": amounts.astype(float),
+        "Type": np.where(is_income.to_numpy(zero_copy_only=False), "Income", "Expense"),
+        "Category": "Unknown"
+    }).reset_index(drop=True)
+    return transactions, error_log
+
+@st.cache_data(show_spinner=False)
+def parse_pdf_text(pdf_bytes, default_date):
+    """
+    Extract and parse the text layer of a PDF.
+    Cached on the file bytes and default date, so reruns and re-uploads of the same file skip pdfplumber
+    while undated lines still pick up the current day.
+    Pages are parsed PDF_PAGES_PER_CHUNK at a time, so only one chunk of raw text is held in memory.
+    
+    Returns:
+        tuple: (DataFrame of transactions, list of parse errors, whether any text was found)
+    """
+    import pdfplumber
+    
+    chunk_frames = []
+    error_log = []
+    has_text = False
+    
+    def flush(lines):
+        chunk_df, chunk_errors = parse_statement_lines(lines, default_date)
+        chunk_frames.append(chunk_df)
+        error_log.extend(chunk_errors)
+    
+    lines = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page_number, page in enumerate(pdf.pages, 1):
+            text = page.extract_text()
+            if text:
+                has_text = True
+                lines.extend(text.split('\n'))
+            # Drop pdfplumber's cached layout objects for the page once its text is out
+            page.close()
+            
+            if page_number % PDF_PAGES_PER_CHUNK == 0 and lines:
+                flush(lines)
+                lines = []
+    
+    if lines:
+        flush(lines)
+    
+    if not has_text:
+        return pd.DataFrame(), [], False
+    
+    extracted_df = pd.concat(chunk_frames, ignore_index=True)
+    return extracted_df, error_log, True
+
+@st.cache_data(show_spinner=False)
+def parse_pdf_ocr(pdf_bytes, default_date):
+    """
+    OCR each page of a scanned PDF and parse the recognised lines.
+    Cached on the file bytes and default date since OCR is by far the slowest extraction path.
+    
+    Returns:
+        tuple: (DataFrame of transactions, list of parse errors)
+    """
+    import pytesseract
+    from pdf2image import convert_from_bytes
+    
+    ocr_lines = []
+    for img in convert_from_bytes(pdf_bytes):
+        ocr_lines.extend(pytesseract.image_to_string(img).split('\n'))
+    
+    # Scanned statements have always kept their balance lines
+    return parse_statement_lines(ocr_lines, default_date, skip_balance=False)
+
+@st.cache_data(show_spinner=False)
+def read_pdf_tables(pdf_bytes):
+    """
+    Extract all tables from a PDF, cached on the file bytes.
+    Uses pdfplumber in-process first and only starts tabula (and its JVM) when pdfplumber finds no tables.
+    
+    Returns:
+        list: One DataFrame per table
+    """
+    import pdfplumber
+    
+    tables = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages:
+            for table in page.extract_tables():
+                if len(table) < 2:
+                    continue
+                header = [str(cell).strip() if cell else f"Column_{i}" for i, cell in enumerate(table[0])]
+                df = pd.DataFrame(table[1:], columns=header)
+                df = df.loc[:, ~df.columns.duplicated()]
+                
+                # pdfplumber returns text cells; convert columns that are entirely numeric like tabula does
+                for col in df.columns:
+                    numeric = pd.to_numeric(df[col].str.replace(",", "", regex=False), errors="coerce")
+                    if numeric.notna().sum() == df[col].notna().sum():
+                        df[col] = numeric
+                tables.append(df)
+    
+    if tables:
+        return tables
+    
+    import tabula
+    return tabula.read_pdf(io.BytesIO(pdf_bytes), pages='all', multiple_tables=True)
+
 def extract_data_from_pdf(uploaded_file):
     """
     Extract transaction data from a PDF file.
@@ -356,133 +691,43 @@ def extract_data_from_pdf(uploaded_file):
     
     # Track any lines that failed parsing for user feedback
     error_log = []
+    # Default date for rows or columns the PDF doesn't provide
+    today = pd.Timestamp.today()
     
     try:
-        # Save the uploaded file to a temporary file
+        # Read the uploaded file once; the cached parsers are keyed on these bytes
         pdf_data = uploaded_file.read()
-        temp_file = io.BytesIO(pdf_data)
         
         # First try to use pdfplumber which doesn't require Java
         with st.spinner("Extracting and analyzing text from PDF..."):
-            extracted_data = []
+            extracted_df = pd.DataFrame()
             
             try:
-                with pdfplumber.open(temp_file) as pdf:
-                    has_text = False
-                    
-                    for page in pdf.pages:
-                        text = page.extract_text()
-                        if text:
-                            has_text = True
-                            lines = text.split('\n')
-                            for line in lines:
-                                # Skip headers and useless stuff
-                                if len(line.strip()) < 8 or "balance" in line.lower():
-                                    continue
-                                
-                                try:
-                                    # Generic regex to find dates anywhere in the line
-                                    date_match = re.search(r'(\d{1,2}[\s/-][A-Za-z]{3,9}[\s/-]\d{2,4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[/-]\d{1,2}|\b\w{3}\s\d{1,2}\b)', line)
-                                    
-                                    # Find all numbers that look like currency amounts
-                                    amount_match = re.findall(r'[\d,]+\.\d{2}', line)
-                                    
-                                    if not amount_match:
-                                        continue
-                                    
-                                    # Use the last number as the amount (common in statements)
-                                    amount = float(amount_match[-1].replace(',', ''))
-                                    
-                                    # Use date if found, otherwise use today's date
-                                    date = date_match.group(0) if date_match else pd.Timestamp.today().strftime('%Y-%m-%d')
-                                    
-                                    # Extract description by removing amounts
-                                    description = re.sub(r'[\d,]+\.\d{2}', '', line)
-                                    # Clean up extra whitespace
-                                    description = re.sub(r'\s+', ' ', description).strip()
-                                    
-                                    # Auto-detect transaction type
-                                    transaction_type = "Expense"
-                                    if re.search(r'(received|deposit|credit|salary|income|refund|transfer\s+in)', description, re.IGNORECASE):
-                                        transaction_type = "Income"
-                                    
-                                    extracted_data.append({
-                                        'Date': date,
-                                        'Name': description,
-                                        'Amount': amount,
-                                        'Type': transaction_type,
-                                        'Category': 'Unknown'
-                                    })
-                                    
-                                except Exception as e:
-                                    error_log.append({"line": line, "error": str(e)})
-                    
-                    # Try OCR if no text was found in the PDF
-                    if not has_text:
-                        try:
-                            # Check if pdf2image and pytesseract are available
-                            import importlib.util
-                            pdf2image_spec = importlib.util.find_spec("pdf2image")
-                            pytesseract_spec = importlib.util.find_spec("pytesseract")
-                            
-                            if pdf2image_spec and pytesseract_spec:
-                                import pytesseract
-                                from pdf2image import convert_from_bytes
-                                
-                                st.info("PDF appears to be scanned. Using OCR to extract text...")
-                                
-                                # Reset the file pointer
-                                temp_file.seek(0)
-                                
-                                # Convert PDF to images and extract text using OCR
-                                images = convert_from_bytes(temp_file.getvalue())
-                                text = ""
-                                for img in images:
-                                    text += pytesseract.image_to_string(img)
-                                
-                                # Process the OCR text line by line
-                                for line in text.split('\n'):
-                                    if len(line.strip()) < 8:
-                                        continue
-                                    
-                                    try:
-                                        # Same processing as above
-                                        date_match = re.search(r'(\d{1,2}[\s/-][A-Za-z]{3,9}[\s/-]\d{2,4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[/-]\d{1,2}|\b\w{3}\s\d{1,2}\b)', line)
-                                        amount_match = re.findall(r'[\d,]+\.\d{2}', line)
-                                        
-                                        if not amount_match:
-                                            continue
-                                        
-                                        amount = float(amount_match[-1].replace(',', ''))
-                                        date = date_match.group(0) if date_match else pd.Timestamp.today().strftime('%Y-%m-%d')
-                                        description = re.sub(r'[\d,]+\.\d{2}', '', line)
-                                        description = re.sub(r'\s+', ' ', description).strip()
-                                        
-                                        transaction_type = "Expense"
-                                        if re.search(r'(received|deposit|credit|salary|income|refund|transfer\s+in)', description, re.IGNORECASE):
-                                            transaction_type = "Income"
-                                        
-                                        extracted_data.append({
-                                            'Date': date,
-                                            'Name': description,
-                                            'Amount': amount,
-                                            'Type': transaction_type,
-                                            'Category': 'Unknown'
-                                        })
-                                    except Exception as e:
-                                        error_log.append({"line": line, "error": str(e)})
-                            else:
-                                st.warning("PDF appears to be scanned. Install pdf2image and pytesseract for OCR support.")
-                                st.code("pip install pdf2image pytesseract", language="bash")
-                        except ImportError:
+                extracted_df, error_log, has_text = parse_pdf_text(pdf_data, today.strftime('%Y-%m-%d'))
+                
+                # Try OCR if no text was found in the PDF
+                if not has_text:
+                    try:
+                        # Check if pdf2image and pytesseract are available
+                        import importlib.util
+                        pdf2image_spec = importlib.util.find_spec("pdf2image")
+                        pytesseract_spec = importlib.util.find_spec("pytesseract")
+                        
+                        if pdf2image_spec and pytesseract_spec:
+                            st.info("PDF appears to be scanned. Using OCR to extract text...")
+                            extracted_df, error_log = parse_pdf_ocr(pdf_data, today.strftime('%Y-%m-%d'))
+                        else:
                             st.warning("PDF appears to be scanned. Install pdf2image and pytesseract for OCR support.")
                             st.code("pip install pdf2image pytesseract", language="bash")
+                    except ImportError:
+                        st.warning("PDF appears to be scanned. Install pdf2image and pytesseract for OCR support.")
+                        st.code("pip install pdf2image pytesseract", language="bash")
             except Exception as e:
                 logging.error(f"pdfplumber extraction failed: {e}")
                 st.error(f"Error extracting text: {str(e)}")
         
         # If pdfplumber found data, use it
-        if extracted_data:
+        if not extracted_df.empty:
             # If there were any parsing errors, show them
             if error_log:
                 with st.expander(f"⚠️ {len(error_log)} lines couldn't be fully parsed", expanded=False):
@@ -493,10 +738,9 @@ def extract_data_from_pdf(uploaded_file):
                     if len(error_log) > 10:
                         st.caption(f"...and {len(error_log) - 10} more")
             
-            st.success(f"✅ Successfully extracted {len(extracted_data)} transactions from PDF text")
+            st.success(f"✅ Successfully extracted {len(extracted_df)} transactions from PDF text")
             
-            # Convert to dataframe
-            result_df = pd.DataFrame(extracted_data)
+            result_df = extracted_df
             
             # Ensure all required columns exist with appropriate defaults
             for col in ["Date", "Name", "Amount", "Category", "Type"]:
@@ -504,7 +748,7 @@ def extract_data_from_pdf(uploaded_file):
                     if col == "Amount":
                         result_df[col] = 0.0
                     elif col == "Date":
-                        result_df[col] = pd.Timestamp.today().strftime('%Y-%m-%d')
+                        result_df[col] = today.strftime('%Y-%m-%d')
                     elif col == "Type":
                         result_df[col] = "Expense"
                     else:
@@ -517,13 +761,10 @@ def extract_data_from_pdf(uploaded_file):
             
             return result_df
         
-        # Otherwise try tabula (requires Java)
+        # Otherwise look for tables (pdfplumber first, then tabula which requires Java)
         try:
             with st.spinner("Analyzing PDF for tables..."):
-                # Reset the file pointer
-                temp_file.seek(0)
-                
-                tables = tabula.read_pdf(temp_file, pages='all', multiple_tables=True)
+                tables = read_pdf_tables(pdf_data)
                 
                 # If tables were found, try to use them
                 if tables and len(tables) > 0:
@@ -540,8 +781,8 @@ def extract_data_from_pdf(uploaded_file):
                     
                     # If we have a good table, use it and return
                     if len(selected_table) > 0:
-                        # Ensure all required columns exist
-                        result_df = selected_table.copy()
+                        # Ensure all required columns exist; the cached tables come back as fresh copies
+                        result_df = selected_table
                         for col in ["Date", "Name", "Amount", "Category", "Type"]:
                             if col not in result_df.columns:
                                 if col == "Amount":
@@ -552,7 +793,7 @@ def extract_data_from_pdf(uploaded_file):
                                     else:
                                         result_df[col] = 0.0
                                 elif col == "Date":
-                                    result_df[col] = pd.Timestamp.today().strftime('%Y-%m-%d')
+                                    result_df[col] = today.strftime('%Y-%m-%d')
                                 elif col == "Type":
                                     result_df[col] = "Expense"
                                 else:
@@ -561,7 +802,7 @@ def extract_data_from_pdf(uploaded_file):
                         st.success(f"✅ Successfully extracted table with {len(result_df)} transactions from PDF")
                         return result_df
         except Exception as e:
-            logging.warning(f"Table extraction with tabula failed: {e}")
+            logging.warning(f"Table extraction failed: {e}")
             st.warning("Could not extract structured tables from PDF. This may be due to missing Java dependency.")
             st.info("If you're seeing Java errors, make sure Java is installed on your system.")
         
@@ -578,7 +819,7 @@ def extract_data_from_pdf(uploaded_file):
             
             for i in range(int(num_transactions)):
                 st.subheader(f"Transaction {i+1}")
-                date = st.date_input(f"Date #{i+1}", value=pd.Timestamp.today())
+                date = st.date_input(f"Date #{i+1}", value=today)
                 amount = st.number_input(f"Amount #{i+1}", value=0.0, step=0.01)
                 name = st.text_input(f"Description/Merchant #{i+1}", value="")
                 category = st.text_input(f"Category #{i+1}", value="Unknown")
@@ -602,7 +843,7 @@ def extract_data_from_pdf(uploaded_file):
                         if col == "Amount":
                             result_df[col] = 0.0
                         elif col == "Date":
-                            result_df[col] = pd.Timestamp.today().strftime('%Y-%m-%d')
+                            result_df[col] = today.strftime('%Y-%m-%d')
                         elif col == "Type":
                             result_df[col] = "Expense"
                         else:
@@ -615,149 +856,441 @@ def extract_data_from_pdf(uploaded_file):
         logging.error(f"PDF extraction failed: {e}")
         raise ValueError(f"Error processing PDF file: {e}")
 
+def _read_excel(source):
+    """
+    Read one sheet of an Excel workbook, asking which one when there are several.
+    
+    Args:
+        source: File-like object with the workbook
+    
+    Returns:
+        DataFrame: The raw sheet contents
+    """
+    # Open the workbook once; the sheet probe and the read share the same parser
+    try:
+        excel_file = pd.ExcelFile(source, engine=EXCEL_ENGINE)
+    except ValueError:
+        # pandas before 2.2 rejects engine="calamine"; fall back to its default reader
+        if EXCEL_ENGINE is None:
+            raise
+        source.seek(0)
+        excel_file = pd.ExcelFile(source)
+    sheet_name = 0
+    if len(excel_file.sheet_names) > 1:
+        sheet_name = st.selectbox("Select sheet:", excel_file.sheet_names)
+    return excel_file.parse(sheet_name=sheet_name)
+
+def _read_parquet(source):
+    """
+    Read a Parquet file with pyarrow.
+    
+    Args:
+        source: File-like object with the file contents
+    
+    Returns:
+        DataFrame: The raw file contents
+    """
+    # Let Arrow free each column as it is converted instead of holding the table and the frame at once
+    return pq.read_table(source).to_pandas(split_blocks=True, self_destruct=True)
+
+# Reader for each tabular file extension, with its format-specific options bound in
+TABULAR_READERS = {
+    ".csv": read_csv_fast,
+    ".txt": functools.partial(read_csv_fast, delimiter="\t"),
+    ".json": read_json_fast,
+    ".parquet": _read_parquet,
+    ".xlsx": _read_excel,
+    ".xls": _read_excel,
+}
+TABULAR_FORMATS = tuple(TABULAR_READERS)
+# Formats whose processing renders no widgets (unlike Excel sheet and PDF table pickers), so results can be cached
+CACHEABLE_FORMATS = (".csv", ".txt", ".json", ".parquet")
+
+def _read_tabular(source, filename):
+    """
+    Read a tabular file into a DataFrame, choosing the reader from the file extension.
+    
+    Args:
+        source: File-like object with the file contents
+        filename (str): Name used to pick the reader
+    
+    Returns:
+        DataFrame: The raw file contents
+    """
+    reader = TABULAR_READERS.get(os.path.splitext(filename)[1])
+    if reader is None:
+        raise ValueError("Unsupported file format.")
+    return reader(source)
+
+def _iter_tabular_chunks(source, filename):
+    """
+    Read a large CSV, TXT or Parquet file in chunks of CHUNK_ROWS rows.
+    
+    Args:
+        source: File-like object with the file contents
+        filename (str): Name used to pick the reader
+    
+    Yields:
+        DataFrame: Consecutive chunks of the raw file contents
+    """
+    if filename.endswith(".parquet"):
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=CHUNK_ROWS):
+            yield batch.to_pandas()
+    else:
+        delimiter = "\t" if filename.endswith(".txt") else ","
+        yield from pd.read_csv(source, delimiter=delimiter, chunksize=CHUNK_ROWS)
+
+def standardize_transactions(data):
+    """
+    Map raw columns onto the standard transaction columns and clean their values.
+    Works on a whole upload or on one chunk of a large one.
+    
+    Args:
+        data (DataFrame): Raw file contents
+    
+    Returns:
+        DataFrame: Data with Name, Amount, Date and Category columns
+    """
+    # Normalize header names once and run both headerless checks on the result
+    columns = data.columns.astype(str).str.strip().str.lower()
+    is_numeric_header = columns.str.isdigit()
+    if (columns.str.startswith("unnamed") | is_numeric_header).all():
+        columns = [f"col_{i}" for i in range(len(columns))]
+        logging.info("Detected headerless file and renamed columns.")
+    elif is_numeric_header[:3].all():
+        columns = [f"Column_{i}" for i in range(len(columns))]
+    data.columns = columns
+
+    # Exact alias hits are one vectorized lookup; only the remaining columns go through fuzzy matching
+    std_names = data.columns.map(ALIAS_TO_STD)
+    unmatched = data.columns[std_names.isna()].unique().tolist()
+    fuzzy_map = batch_fuzzy_column_match(unmatched, DESIRED_COLUMNS) if unmatched else {}
+
+    # Only the first column mapped to a standard name takes it; later ones keep their own names
+    col_map = {}
+    used_std_cols = set()
+    for col, std_col in zip(data.columns, std_names):
+        if col in col_map:
+            continue
+        if pd.isna(std_col):
+            std_col = fuzzy_map[col]
+        if std_col in used_std_cols:
+            std_col = col
+        elif std_col in DESIRED_COLUMNS:
+            used_std_cols.add(std_col)
+        col_map[col] = std_col
+    data.rename(columns=col_map, inplace=True)
+
+    # Headers that differed only by case or whitespace can still collide after normalizing
+    if data.columns.has_duplicates:
+        data = data.loc[:, ~data.columns.duplicated()]
+
+    today = pd.Timestamp.today()
+    required_cols = ["Name", "Amount", "Date", "Category"]
+    for col in required_cols:
+        if col not in data.columns:
+            if col == "Amount":
+                data[col] = 0.0
+                logging.info(f"Created missing {col} column with default value 0.0")
+            elif col == "Date":
+                data[col] = today.date()
+                logging.info(f"Created missing {col} column with today's date")
+            else:
+                data[col] = "Unknown"
+                logging.info(f"Created missing {col} column with default value 'Unknown'")
+
+    if "Name" in data.columns and "Amount" in data.columns and "Date" not in data.columns:
+        data["Date"] = today.strftime("%Y-%m-%d")
+        logging.info("Added placeholder Date column to dataset with only Name and Amount")
+    
+    if "Amount" not in data.columns:
+        numeric_cols = data.select_dtypes(include=['number']).columns
+        if len(numeric_cols) > 0:
+            data.rename(columns={numeric_cols[0]: "Amount"}, inplace=True)
+            logging.info(f"Auto-detected Amount column from numeric column: {numeric_cols[0]}")
+    
+    # Fill gaps per column type so numeric columns stay numeric (a frame-wide "Unknown" made them object)
+    numeric_cols = data.select_dtypes(include="number").columns
+    data[numeric_cols] = data[numeric_cols].fillna(0.0)
+    for col in data.columns.difference(numeric_cols, sort=False):
+        if not pd.api.types.is_datetime64_any_dtype(data[col]):
+            data[col] = fillna_text(data[col], "Unknown")
+
+    data = filter_and_clean_data(data)
+
+    if "Category" in data.columns:
+        data["Category"] = data["Category"].astype(str).str.strip().str.title()
+
+    if "Name" in data.columns:
+        data["Name"] = data["Name"].astype(str).str.strip()
+
+    if "Date" in data.columns and not pd.api.types.is_datetime64_any_dtype(data["Date"]):
+        try:
+            data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
+        except Exception as e:
+            logging.warning(f"Could not parse Date: {e}")
+
+    return data
+
+def _read_and_standardize(source, filename, size_mb):
+    """
+    Read a tabular file and standardize it. Large CSV, TXT and Parquet files are read and
+    cleaned chunk by chunk, so only the cleaned data is held in memory as a whole.
+    
+    Args:
+        source: File-like object with the file contents
+        filename (str): Name used to pick the reader
+        size_mb (float): Size of the file in megabytes
+    
+    Returns:
+        DataFrame: Standardized transaction data
+    """
+    if size_mb > LARGE_FILE_MB and filename.endswith((".csv", ".txt", ".parquet")):
+        chunks = []
+        for chunk in _iter_tabular_chunks(source, filename):
+            chunk = standardize_transactions(chunk)
+            # Hold categories as codes while the remaining chunks are read
+            chunk["Category"] = chunk["Category"].astype("category")
+            chunks.append(chunk)
+        if not chunks:
+            raise ValueError("The uploaded file appears to be empty or has no recognizable columns.")
+        # Give every chunk the same categories so concat keeps the categorical dtype
+        categories = union_categoricals([chunk["Category"] for chunk in chunks], sort_categories=True).categories
+        for chunk in chunks:
+            chunk["Category"] = chunk["Category"].cat.set_categories(categories)
+        return pd.concat(chunks, ignore_index=True)
+    
+    data = _read_tabular(source, filename)
+    if data.empty or len(data.columns) == 0:
+        raise ValueError("The uploaded file appears to be empty or has no recognizable columns.")
+    return standardize_transactions(data)
+
 def process_uploaded_file(uploaded_file):
     """
     Process the uploaded file and return a cleaned DataFrame with intelligently mapped columns.
     """
     try:
+        uploaded_file.seek(0, os.SEEK_END)
+        file_size_mb = uploaded_file.tell() / (1024 * 1024)
+        uploaded_file.seek(0)
+        
+        if file_size_mb > LARGE_FILE_MB:
+            st.warning(f"Large file detected ({file_size_mb:.1f} MB). Processing may take longer.", icon="⚠️")
+        
         if uploaded_file.name.endswith(".zip"):
             import zipfile
-            import io
             
             with zipfile.ZipFile(uploaded_file) as z:
-                supported_formats = [".csv", ".xlsx", ".xls", ".json", ".txt", ".parquet"]
-                for filename in z.namelist():
-                    if any(filename.endswith(fmt) for fmt in supported_formats):
-                        with z.open(filename) as file:
-                            file_content = io.BytesIO(file.read())
-                            file_content.name = filename
-                            return process_uploaded_file(file_content)
-                            
-            raise ValueError("No supported files found in ZIP archive.")
-                
-        if uploaded_file.name.endswith(".csv"):
-            data = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith((".xlsx", ".xls")):
-            excel_file = pd.ExcelFile(uploaded_file)
-            if len(excel_file.sheet_names) > 1:
-                sheet_name = st.selectbox("Select sheet:", excel_file.sheet_names)
-                data = pd.read_excel(excel_file, sheet_name=sheet_name)
-            else:
-                data = pd.read_excel(uploaded_file)
-        elif uploaded_file.name.endswith(".json"):
-            data = pd.read_json(uploaded_file)
-        elif uploaded_file.name.endswith(".txt"):
-            data = pd.read_csv(uploaded_file, delimiter="\t")
-        elif uploaded_file.name.endswith(".parquet"):
-            data = pd.read_parquet(uploaded_file)
+                # Pick the largest supported member so a bundled README doesn't win over the data
+                target = max(
+                    (info for info in z.infolist() if info.filename.endswith(TABULAR_FORMATS)),
+                    key=lambda info: info.file_size,
+                    default=None
+                )
+                if target is None:
+                    raise ValueError("No supported files found in ZIP archive.")
+                with z.open(target) as file:
+                    data = _read_and_standardize(file, target.filename, target.file_size / (1024 * 1024))
+        elif uploaded_file.name.endswith(TABULAR_FORMATS):
+            data = _read_and_standardize(uploaded_file, uploaded_file.name, file_size_mb)
         elif uploaded_file.name.endswith(".pdf"):
             # Call our PDF extraction function
             return extract_data_from_pdf(uploaded_file)
         else:
             raise ValueError("Unsupported file format.")
 
-        uploaded_file.seek(0, os.SEEK_END)
-        file_size_mb = uploaded_file.tell() / (1024 * 1024)
-        uploaded_file.seek(0)
+        if len(data) > 50000:
+            st.warning(f"Large dataset detected ({len(data):,} rows). Consider using a smaller sample for better performance.", icon="⚠️")
+
+        # Few distinct categories over many rows: store them as codes plus a small lookup table
+        if "Category" in data.columns:
+            data["Category"] = data["Category"].astype("category")
         
-        row_count = len(data)
+        # Merchant names repeat too; store them as codes when at most half of them are distinct
+        if "Name" in data.columns and data["Name"].nunique() <= len(data) // 2:
+            data["Name"] = data["Name"].astype("category")
         
-        if file_size_mb > 50:
-            st.warning(f"Large file detected ({file_size_mb:.1f} MB). Processing may take longer.", icon="⚠️")
-        if row_count > 50000:
-            st.warning(f"Large dataset detected ({row_count:,} rows). Consider using a smaller sample for better performance.", icon="⚠️")
-
-        if data.empty or len(data.columns) == 0:
-            raise ValueError("The uploaded file appears to be empty or has no recognizable columns.")
+        # Extra integer columns rarely need 64 bits; Amount stays float64 so sums keep their cents
+        if "Amount" in data.columns and pd.api.types.is_numeric_dtype(data["Amount"]):
+            data["Amount"] = data["Amount"].astype("float64")
+        int_cols = data.select_dtypes(include="integer").columns.drop("Amount", errors="ignore")
+        if len(int_cols):
+            data[int_cols] = data[int_cols].apply(pd.to_numeric, downcast="integer")
 
-        if all(str(col).lower().startswith("unnamed") or str(col).isdigit() for col in data.columns):
-            data.columns = [f"col_{i}" for i in range(data.shape[1])]
-            logging.info("Detected headerless file and renamed columns.")
-
-        data.columns = [str(col).strip().lower() for col in data.columns]
-
-        if all(str(c).isdigit() for c in data.columns[:3]):
-            data.columns = [f"Column_{i}" for i in range(len(data.columns))]
-
-        desired_columns = {
-            "Amount": ["amount", "sum", "price", "cost", "total", "payment", "value", "expense"],
-            "Name": ["name", "merchant", "vendor", "store", "description", "desc", "transaction", "details", "item"],
-            "Date": ["date", "time", "day", "when", "timestamp"],
-            "Category": ["category", "cat", "type", "group", "label", "classification"]
-        }
-
-        col_map = {}
-        for col in data.columns:
-            matched = False
-            for std_col, aliases in desired_columns.items():
-                if FUZZY_MATCHING_AVAILABLE:
-                    match = fuzzy_column_match(col, aliases)
-                    if match:
-                        col_map[col] = std_col
-                        matched = True
-                        break
-                else:
-                    if any(alias in col.lower() for alias in aliases):
-                        col_map[col] = std_col
-                        matched = True
-                        break
-            
-            if not matched:
-                col_map[col] = col
+        # One stable sort; newest first within each category
+        if all(col in data.columns for col in ["Category", "Date"]):
+            data = data.sort_values(by=["Category", "Date"], ascending=[True, False], kind="stable")
 
-        data.rename(columns=col_map, inplace=True)
+        logging.info(f"Processed upload: {uploaded_file.name}")
+        return data
 
-        data = data.loc[:, ~data.columns.duplicated()]
+    except Exception as e:
+        logging.error(f"File processing failed: {e}")
+        raise ValueError(f"Error processing file: {e}")
 
-        required_cols = ["Name", "Amount", "Date", "Category"]
-        for col in required_cols:
-            if col not in data.columns:
-                if col == "Amount":
-                    data[col] = 0.0
-                    logging.info(f"Created missing {col} column with default value 0.0")
-                elif col == "Date":
-                    data[col] = pd.to_datetime("today").date()
-                    logging.info(f"Created missing {col} column with today's date")
-                else:
-                    data[col] = "Unknown"
-                    logging.info(f"Created missing {col} column with default value 'Unknown'")
-
-        if "Name" in data.columns and "Amount" in data.columns and "Date" not in data.columns:
-            data["Date"] = pd.Timestamp.today().strftime("%Y-%m-%d")
-            logging.info("Added placeholder Date column to dataset with only Name and Amount")
-        
-        if "Amount" not in data.columns:
-            numeric_cols = data.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
-                data.rename(columns={numeric_cols[0]: "Amount"}, inplace=True)
-                logging.info(f"Auto-detected Amount column from numeric column: {numeric_cols[0]}")
-        
-        data.fillna("Unknown", inplace=True)
+def summarize_transactions(data):
+    """
+    Row, column and missing-value counts for the Data Summary.
+    Kept in session state and recomputed only when the transactions version or shape changes,
+    so widget reruns skip the full missing-value scan.
+    
+    Args:
+        data (DataFrame): Transaction data in session state
+    
+    Returns:
+        tuple: (rows, columns, missing values)
+    """
+    key = (st.session_state.get("transactions_version", 0), data.shape)
+    cached = st.session_state.get("_transactions_summary")
+    if cached is None or cached[0] != key:
+        # Count per column so no frame-wide boolean mask is built
+        missing = sum(int(column.isna().sum()) for _, column in data.items())
+        cached = (key, (len(data), len(data.columns), missing))
+        st.session_state["_transactions_summary"] = cached
+    return cached[1]
 
-        data = filter_and_clean_data(data)
+def to_csv_bytes(data):
+    """
+    Serialize a DataFrame to CSV with pyarrow's multithreaded writer.
+    Not byte-identical to DataFrame.to_csv: Arrow quotes the header and every string value even with
+    quoting_style="needed", writes whole floats without a decimal (-2) and booleans in lower case.
+    Falls back to DataFrame.to_csv for columns Arrow can't convert (e.g. mixed object columns)
+    and for pyarrow versions whose CSV writer has no quoting_style option.
+    
+    Args:
+        data (DataFrame): Data to export
+    
+    Returns:
+        bytes: UTF-8 encoded CSV with a header row
+    """
+    try:
+        write_options = pacsv.WriteOptions(quoting_style="needed")
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    except (TypeError, pa.ArrowInvalid, pa.ArrowTypeError):
+        return data.to_csv(index=False).encode("utf-8")
+    
+    # Write date-only timestamps as plain dates and the rest to the second,
+    # instead of Arrow's default microsecond-resolution timestamps
+    for i, name in enumerate(table.column_names):
+        column = data[name]
+        if not pd.api.types.is_datetime64_any_dtype(column):
+            continue
+        present = column.dropna()
+        if (present == present.dt.normalize()).all():
+            table = table.set_column(i, name, table.column(i).cast(pa.date32()))
+        else:
+            # %z gives +0000; to_csv writes the offset as +00:00
+            text = column.dt.strftime("%Y-%m-%d %H:%M:%S%z").str.replace(r"([+-]\d\d)(\d\d)$", r"\1:\2", regex=True)
+            table = table.set_column(i, name, pa.array(text, type=pa.string(), from_pandas=True))
+    
+    buffer = io.BytesIO()
+    pacsv.write_csv(table, buffer, write_options=write_options)
+    return buffer.getvalue()
 
-        if "Category" in data.columns:
-            data["Category"] = data["Category"].astype(str).str.strip().str.title()
+def to_excel_bytes(data, sheet_name="Filtered Data"):
+    """
+    Serialize a DataFrame to an .xlsx workbook with xlsxwriter's constant-memory mode.
+    Rows are written strictly in order so each one is flushed as soon as it's complete;
+    DataFrame.to_excel writes column by column, which constant-memory mode silently drops.
+    
+    Args:
+        data (DataFrame): Data to export
+        sheet_name (str): Name of the worksheet
+    
+    Returns:
+        bytes: The .xlsx file contents
+    """
+    import xlsxwriter
+    
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {"constant_memory": True, "remove_timezone": True})
+    worksheet = workbook.add_worksheet(sheet_name)
+    
+    header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+    worksheet.write_row(0, 0, [str(col) for col in data.columns], header_format)
+    
+    # Dates need a number format to display as dates; date-only columns drop the time, as in to_csv_bytes
+    cell_formats = {}
+    for i, name in enumerate(data.columns):
+        column = data[name]
+        if pd.api.types.is_datetime64_any_dtype(column):
+            dates = column.dropna()
+            num_format = "yyyy-mm-dd" if (dates == dates.dt.normalize()).all() else "yyyy-mm-dd hh:mm:ss"
+            cell_formats[i] = workbook.add_format({"num_format": num_format})
+    
+    for row_idx, row in enumerate(data.itertuples(index=False, name=None), start=1):
+        for col_idx, value in enumerate(row):
+            # Missing values are left as blank cells
+            if not pd.isna(value):
+                worksheet.write(row_idx, col_idx, value, cell_formats.get(col_idx))
+    
+    workbook.close()
+    return buffer.getvalue()
 
-        if "Name" in data.columns:
-            data["Name"] = data["Name"].astype(str).str.strip()
+def to_parquet_bytes(data):
+    """
+    Serialize a DataFrame to zstd-compressed Parquet, the same way user data is saved.
+    
+    Args:
+        data (DataFrame): Data to export
+    
+    Returns:
+        bytes: The .parquet file contents
+    """
+    buffer = io.BytesIO()
+    write_user_frame(data, buffer)
+    return buffer.getvalue()
 
-        if "Date" in data.columns:
-            try:
-                data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
-                data = data.sort_values(by="Date", ascending=False)
-            except Exception as e:
-                logging.warning(f"Could not sort by Date: {e}")
+EXPORT_WRITERS = {"CSV": to_csv_bytes, "Excel": to_excel_bytes, "Parquet": to_parquet_bytes}
 
-        if all(col in data.columns for col in ["Category", "Date"]):
-            data = data.sort_values(by=["Category", "Date"], ascending=[True, False])
+# Recent Streamlit releases accept a callable as st.download_button's data and only call it on click;
+# older ones (requirements allow streamlit>=1.10) need the bytes up front
+DOWNLOAD_ACCEPTS_CALLABLE = bool(re.search(r"data : [^\n]*callable", st.download_button.__doc__ or ""))
 
-        logging.info(f"Processed upload: {uploaded_file.name}")
-        return data
+def get_export_data(data, export_format):
+    """
+    Zero-argument callable that builds the cleaned export file for the download button.
+    The bytes are kept per format until the transactions version or shape changes,
+    so reruns and repeat downloads don't rebuild the file.
+    
+    Args:
+        data (DataFrame): Transaction data in session state
+        export_format (str): "CSV", "Excel" or "Parquet"
+    
+    Returns:
+        tuple: (callable returning the export file contents as bytes, whether they are already built)
+    """
+    key = (st.session_state.get("transactions_version", 0), data.shape)
+    cached = st.session_state.get("_export_bytes")
+    if cached is None or cached["key"] != key:
+        cached = {"key": key}
+        st.session_state["_export_bytes"] = cached
+    
+    # May run outside the script thread, so it only touches the plain dict captured here
+    def build():
+        if export_format not in cached:
+            cached[export_format] = EXPORT_WRITERS[export_format](filter_and_clean_data(data))
+        return cached[export_format]
+    
+    return build, export_format in cached
 
-    except Exception as e:
-        logging.error(f"File processing failed: {e}")
-        raise ValueError(f"Error processing file: {e}")
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=20)
+def process_upload_bytes(file_hash, filename, _file_bytes):
+    """
+    Process the contents of an uploaded file, cached on a SHA-256 of its bytes.
+    Re-uploading the same file skips parsing and column mapping; the bytes themselves are not hashed by Streamlit.
+    
+    Args:
+        file_hash (str): SHA-256 hex digest of the file contents
+        filename (str): Original file name, used to pick the reader
+        _file_bytes (bytes): The file contents
+    
+    Returns:
+        DataFrame: The processed transaction data
+    """
+    source = io.BytesIO(_file_bytes)
+    source.name = filename
+    return process_uploaded_file(source)
 
 # Check if the demo button was clicked
 if demo_button:
@@ -797,7 +1330,9 @@ if st.session_state["demo_active"]:
                         
                         if not duplicates.empty:
                             st.warning(f"Found {len(duplicates)} potential duplicate transactions.")
-                            st.dataframe(duplicates)
+                            st.dataframe(duplicates.head(DUPLICATE_PREVIEW_ROWS))
+                            if len(duplicates) > DUPLICATE_PREVIEW_ROWS:
+                                st.caption(f"Showing the {DUPLICATE_PREVIEW_ROWS} most similar pairs. Download the report for all {len(duplicates)}.")
                             
                             csv = duplicates.to_csv(index=False)
                             st.download_button(
@@ -809,10 +1344,12 @@ if st.session_state["demo_active"]:
                             )
                         else:
                             st.success("No potential duplicate transactions found!")
-        
+        elif not FUZZY_MATCHING_AVAILABLE:
+            st.warning("Install 'rapidfuzz' for duplicate detection and better column matching: `pip install rapidfuzz`", icon="⚠️")
+
         # Show data profiling option with the demo data
-        if PROFILING_AVAILABLE:
-            with st.expander("📊 Advanced Data Profile", expanded=True):
+        with st.expander("📊 Advanced Data Profile", expanded=True):
+            if PROFILING_AVAILABLE:
                 st.info("Generate a detailed profile of the demo transaction data")
                 if st.button("Generate Detailed Data Profile", key="demo_generate_profile"):
                     with st.spinner("Generating comprehensive data profile..."):
@@ -821,6 +1358,8 @@ if st.session_state["demo_active"]:
                             st.components.v1.html(profile_html, height=600, scrolling=True)
                         else:
                             st.error("Failed to generate data profile. Check logs for details.")
+            else:
+                show_profiling_install_hint()
         
         st.info("👀 You're viewing sample transaction data. Explore the dashboard to see analytics and charts!")
 
@@ -828,8 +1367,12 @@ elif uploaded_file:
     # Add protection against reprocessing on every widget interaction
     if uploaded_file and not st.session_state["file_uploaded"]:
         try:
-            data = process_uploaded_file(uploaded_file)
-            st.session_state["transactions"] = data.copy()
+            if uploaded_file.name.endswith(CACHEABLE_FORMATS):
+                file_bytes = uploaded_file.getvalue()
+                data = process_upload_bytes(hashlib.sha256(file_bytes).hexdigest(), uploaded_file.name, file_bytes)
+            else:
+                data = process_uploaded_file(uploaded_file)
+            set_transactions(data)
             st.session_state["file_uploaded"] = True
             st.session_state["uploaded_file_name"] = uploaded_file.name
             st.session_state["upload_timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -866,9 +1409,11 @@ elif uploaded_file:
             st.session_state["file_uploaded"] = False
     
     # Show data profile expander regardless of whether we just processed the file or not
-    if "transactions" in st.session_state and not st.session_state["transactions"].empty and PROFILING_AVAILABLE:
+    if "transactions" in st.session_state and not st.session_state["transactions"].empty:
         with st.expander("📊 Advanced Data Profile", expanded=False):
-            if st.button("Generate Detailed Data Profile"):
+            if not PROFILING_AVAILABLE:
+                show_profiling_install_hint()
+            elif st.button("Generate Detailed Data Profile"):
                 with st.spinner("Generating comprehensive data profile..."):
                     profile_html = generate_data_profile(st.session_state["transactions"])
                     if profile_html:
@@ -876,11 +1421,12 @@ elif uploaded_file:
                     else:
                         st.error("Failed to generate data profile. Check logs for details.")
 
-if "transactions" in st.session_state and not st.session_state["transactions"].empty:
+# Read the session frame once for the summary, save and export sections below
+transactions = st.session_state.get("transactions")
+
+if transactions is not None and not transactions.empty:
     with st.expander("📊 Data Summary", expanded=False):
-        num_rows = len(st.session_state["transactions"])
-        num_columns = len(st.session_state["transactions"].columns)
-        num_missing = st.session_state["transactions"].isnull().sum().sum()
+        num_rows, num_columns, num_missing = summarize_transactions(transactions)
         st.markdown(f"**Total Rows:** `{num_rows}` | **Columns:** `{num_columns}` | **Missing Values:** `{num_missing}`")
     
     if "upload_history" in st.session_state and st.session_state["upload_history"]:
@@ -894,64 +1440,81 @@ if "transactions" in st.session_state and not st.session_state["transactions"].e
         "upload_history": st.session_state.get("upload_history", [])
     }
     
-    # Create a copy to avoid SettingWithCopyWarning
-    if "transactions" in st.session_state:
-        st.session_state["transactions"] = st.session_state["transactions"].copy()
-        
-        # Required columns for validation
-        required_string_cols = ["Name", "Category", "Type"]
-        
-        # Add missing columns with defaults before conversion
-        for col in required_string_cols:
-            if col not in st.session_state["transactions"].columns:
-                st.session_state["transactions"][col] = "Unknown"
-        
-        # Replace NaNs and enforce string type for all text columns
-        st.session_state["transactions"][required_string_cols] = (
-            st.session_state["transactions"][required_string_cols]
-            .fillna("Unknown")
-            .astype(str)
-        )
-        
-        # Optional date check and standardization
-        if "Date" in st.session_state["transactions"].columns:
-            st.session_state["transactions"]["Date"] = pd.to_datetime(
-                st.session_state["transactions"]["Date"], errors="coerce"
-            ).fillna(pd.Timestamp.today())
-        
-        # Now safely save the data
-        save_user_data(username, st.session_state["transactions"], metadata)
-    else:
-        st.warning("No transaction data available to save.")
+    # Required columns for validation; they are replaced on the session frame itself, which is never shared with a cached result
+    required_string_cols = ["Name", "Category", "Type"]
+    
+    # Track whether anything below actually changes the data or a dtype, so caches keyed on the version are refreshed
+    changed = False
+    
+    # Add missing columns with defaults before conversion
+    for col in required_string_cols:
+        if col not in transactions.columns:
+            transactions[col] = "Unknown"
+            changed = True
+    
+    # Replace NaNs and enforce string type for all text columns; categorical columns keep their codes
+    for col in required_string_cols:
+        original = transactions[col]
+        column = fillna_text(original, "Unknown")
+        if not isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype(str)
+        changed = changed or original.hasnans or column.dtype != original.dtype
+        transactions[col] = column
+    
+    # Optional date check and standardization
+    if "Date" in transactions.columns:
+        original = transactions["Date"]
+        dates = pd.to_datetime(original, errors="coerce").fillna(pd.Timestamp.today())
+        changed = changed or original.hasnans or dates.dtype != original.dtype
+        transactions["Date"] = dates
+    
+    if changed:
+        set_transactions(transactions)
+    
+    # Now safely save the data
+    save_user_data(username, transactions, metadata)
     
     st.info("💾 Your data is automatically saved and will be available when you return to this page.")
 else:
     with st.expander("📊 Data Summary", expanded=False):
         st.markdown("**Total Rows:** `0` | **Columns:** `0` | **Missing Values:** `0`")
 
-if "transactions" in st.session_state:
+if transactions is not None:
     st.subheader("⬇️ Export Your Cleaned Data")
-    filtered_data = filter_and_clean_data(st.session_state["transactions"])
-    export_format = st.selectbox("Choose export format:", ["CSV", "Excel"])
-    
-    if export_format == "CSV":
-        st.download_button(
-            label="Download CSV",
-            data=filtered_data.to_csv(index=False),
-            file_name="filtered_data.csv",
-            mime="text/csv"
-        )
-    elif export_format == "Excel":
-        from io import BytesIO
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            filtered_data.to_excel(writer, index=False, sheet_name="Filtered Data")
-        st.download_button(
-            label="Download Excel File",
-            data=output.getvalue(),
-            file_name="filtered_data.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    export_format = st.selectbox("Choose export format:", ["CSV", "Excel", "Parquet"])
+    build_export, export_built = get_export_data(transactions, export_format)
+    
+    # Only build the file when it will be downloaded: on click where Streamlit supports it, otherwise on request
+    if DOWNLOAD_ACCEPTS_CALLABLE:
+        export_data = build_export
+    elif export_built or st.button("Prepare export"):
+        export_data = build_export()
+    else:
+        export_data = None
+        st.caption("The file is built once and kept until your data changes.")
+    
+    if export_data is not None:
+        if export_format == "CSV":
+            st.download_button(
+                label="Download CSV",
+                data=export_data,
+                file_name="filtered_data.csv",
+                mime="text/csv"
+            )
+        elif export_format == "Excel":
+            st.download_button(
+                label="Download Excel File",
+                data=export_data,
+                file_name="filtered_data.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+        elif export_format == "Parquet":
+            st.download_button(
+                label="Download Parquet File",
+                data=export_data,
+                file_name="filtered_data.parquet",
+                mime="application/octet-stream"
+            )
 
 st.subheader("FAQ")
 with st.expander("What file formats are supported?"):
@@ -966,7 +1529,7 @@ with st.expander("What file formats are supported?"):
     - **PDF**: Portable Document Format
     """)
 with st.expander("How do I export my data?"):
-    st.write("Select the desired format (CSV or Excel) and click the Export button. The data will be filtered and cleaned before export.")
+    st.write("Select the desired format (CSV, Excel or Parquet) and click the Export button. The data will be filtered and cleaned before export.")
 with st.expander("What happens if my data has missing columns or messy names?"):
     st.write("The app will attempt to standardize column names and fill missing columns with empty values. It can work with just 'Date', 'Amount', and 'Name' fields. Ensure your data has at least these fields for basic functionality.")
 with st.expander("Troubleshooting Upload Errors"):
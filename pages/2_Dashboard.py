@@ -6,18 +6,12 @@ Adapts to available data fields with graceful fallbacks.
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import timedelta
 from auth import restrict_access
 from utils import get_transactions
-import plotly.express as px  # Import plotly for interactive charts
 
-# Set the page configuration
-st.set_page_config(page_title="Expense Dashboard", layout="wide")
-
-# Custom styling
-st.markdown("""
+# Page styles; elements not re-emitted on a rerun are cleared, so this is sent every run
+DASHBOARD_CSS = """
 <style>
     .metric-card {
         border: 1px solid #f0f2f6;
@@ -61,18 +55,115 @@ st.markdown("""
         opacity: 1;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-restrict_access()
+# Shown instead of the dashboard when the account has no transactions
+QUICK_START_MD = """
+### Quick Start
+1. Go to the Upload page to add your financial data
+2. Return here to see your personalized dashboard
+3. Explore insights about your spending patterns
+"""
 
-if "authenticated" not in st.session_state or not st.session_state["authenticated"]:
-    st.error("Please login to view this page.")
-    st.stop()
+# Set the page configuration
+st.set_page_config(page_title="Expense Dashboard", layout="wide")
+
+restrict_access()
 
 if "user" not in st.session_state:
     st.error("Please login to view this page.")
     st.stop()
 
+required_columns = ["Date", "Amount", "Name"]
+optional_columns = ["Type", "Category"]
+
+# Keywords that mark a Type value as income or expense; income wins when both appear
+INCOME_TYPE_PATTERN = "income|revenue|salary|deposit|credit"
+EXPENSE_TYPE_PATTERN = "expense|cost|payment|debit|purchase"
+
+# Bar colors for the income/expense breakdown; other labels use Plotly's default blue
+TYPE_COLORS = {"Income": "#2E8B57", "Expense": "#CD5C5C"}
+
+def prepare_transactions(data):
+    """
+    Add missing columns, coerce Amount and Date, and label each transaction's TypeCategory.
+    Kept in session state and redone only when the transactions version or shape changes,
+    so date filter changes and other widget reruns reuse the prepared frame.
+    
+    Args:
+        data (DataFrame): Transaction data from get_transactions
+    
+    Returns:
+        tuple: (prepared DataFrame, list of required columns that were missing)
+    """
+    key = (st.session_state.get("transactions_version", 0), data.shape)
+    cached = st.session_state.get("_dashboard_data")
+    if cached is None or cached[0] != key:
+        # Shallow copy: columns are only replaced, so the session frame keeps its own dtypes
+        data = data.copy(deep=False)
+        
+        missing_required = [col for col in required_columns if col not in data.columns]
+        for col in missing_required:
+            if col == "Date":
+                data[col] = pd.to_datetime("today")
+            elif col == "Amount":
+                data[col] = 0.0
+            else:
+                data[col] = "Unknown"
+        
+        # Add optional columns if needed
+        for col in optional_columns:
+            if col not in data.columns:
+                if col == "Type":
+                    data[col] = "Expense"
+                else:
+                    data[col] = "Unknown"
+        
+        # Convert data types BEFORE filtering
+        data["Amount"] = pd.to_numeric(data["Amount"], errors="coerce").fillna(0)
+        data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
+        
+        # Pre-process Type information
+        type_values = data["Type"].astype(str).str.lower().str.strip()
+        data["Type"] = type_values
+        
+        # Keyword matches become Income or Expense; anything else keeps its own title-cased name
+        type_category = type_values.str.title()
+        type_category = type_category.mask(type_values.str.contains(EXPENSE_TYPE_PATTERN), "Expense")
+        data["TypeCategory"] = type_category.mask(type_values.str.contains(INCOME_TYPE_PATTERN), "Income")
+        
+        # Low-cardinality labels group on integer codes instead of hashing strings
+        for col in ("Category", "Type", "TypeCategory"):
+            data[col] = data[col].astype("category")
+        
+        cached = (key, data, missing_required)
+        st.session_state["_dashboard_data"] = cached
+    
+    # Hand out a shallow copy so columns added further down the page don't leak into the cache
+    return cached[1].copy(deep=False), cached[2]
+
+def filter_by_date(data, start, end):
+    """
+    Keep the transactions dated from start to end, inclusive.
+    The result is kept in session state alongside the prepared frame, so reruns that
+    leave the date range alone reuse it instead of rescanning every row.
+    
+    Args:
+        data (DataFrame): Prepared transaction data from prepare_transactions
+        start (Timestamp): First day of the range
+        end (Timestamp): Last day of the range
+        
+    Returns:
+        DataFrame: Transactions within the range, possibly empty
+    """
+    key = (st.session_state.get("transactions_version", 0), data.shape, start, end)
+    cached = st.session_state.get("_dashboard_filtered")
+    if cached is None or cached[0] != key:
+        cached = (key, data[data["Date"].between(start, end)])
+        st.session_state["_dashboard_filtered"] = cached
+    
+    return cached[1].copy(deep=False)
+
 # Only get transactions once
 username = st.session_state["user"]
 data = get_transactions()
@@ -88,42 +179,21 @@ st.markdown(
 
 if data.empty:
     st.info("🔍 No transaction data found. Upload some data to view insights!")
-    st.markdown("### Quick Start")
-    st.markdown("""
-    1. Go to the Upload page to add your financial data
-    2. Return here to see your personalized dashboard
-    3. Explore insights about your spending patterns
-    """)
+    st.markdown(QUICK_START_MD)
     st.stop()
 
+# Plotly is only imported once there is data to chart, so empty accounts never load it
+import plotly.graph_objects as go
+
+# Custom styling, only needed by the sections below
+st.markdown(DASHBOARD_CSS, unsafe_allow_html=True)
+
 st.title("📊 Financial Dashboard")
 
 # Ensure required columns exist - do this before filtering
-required_columns = ["Date", "Amount", "Name"]
-optional_columns = ["Type", "Category"]
-
-missing_required = [col for col in required_columns if col not in data.columns]
+data, missing_required = prepare_transactions(data)
 if missing_required:
     st.warning(f"Missing required columns: {', '.join(missing_required)}. Some features may not work correctly.")
-    for col in missing_required:
-        if col == "Date":
-            data[col] = pd.to_datetime("today")
-        elif col == "Amount":
-            data[col] = 0.0
-        else:
-            data[col] = "Unknown"
-
-# Add optional columns if needed
-for col in optional_columns:
-    if col not in data.columns:
-        if col == "Type":
-            data[col] = "Expense"
-        else:
-            data[col] = "Unknown"
-
-# Convert data types BEFORE filtering
-data["Amount"] = pd.to_numeric(data["Amount"], errors="coerce").fillna(0)
-data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
 
 # Apply date filtering early
 with st.sidebar:
@@ -142,47 +212,38 @@ with st.sidebar:
     
     if len(date_range) == 2:
         start, end = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-        filtered_data = data[(data["Date"] >= start) & (data["Date"] <= end)]
+        filtered_data = filter_by_date(data, start, end)
         if not filtered_data.empty:
             data = filtered_data  # Override data with filtered data
             st.success(f"Showing data from {start.date()} to {end.date()}")
         else:
             st.warning("No data in selected date range. Showing all data.")
 
-# Pre-process Type information
+# Income vs expense metrics from the TypeCategory labels
 if "Type" in data.columns:
-    # Using proper .loc[] to avoid SettingWithCopyWarning
-    data_copy = data.copy()
-    data_copy.loc[:, "Type"] = data_copy["Type"].astype(str).str.lower().str.strip()
-    
-    # Define helper for categorizing types
-    def categorize_type(type_value):
-        income_keywords = ["income", "revenue", "salary", "deposit", "credit"]
-        expense_keywords = ["expense", "cost", "payment", "debit", "purchase"]
-        
-        if any(keyword in type_value for keyword in income_keywords):
-            return "Income"
-        elif any(keyword in type_value for keyword in expense_keywords):
-            return "Expense"
-        else:
-            return type_value.title()
-    
-    data_copy.loc[:, "TypeCategory"] = data_copy["Type"].apply(categorize_type)
-    data = data_copy
-    
     # Pre-calculate income vs expense metrics
-    type_data = data.groupby("TypeCategory")["Amount"].sum().reset_index()
-    income_amount = type_data.loc[type_data["TypeCategory"] == "Income", "Amount"].sum() if "Income" in type_data["TypeCategory"].values else 0
-    expense_amount = type_data.loc[type_data["TypeCategory"] == "Expense", "Amount"].sum() if "Expense" in type_data["TypeCategory"].values else 0
+    type_sums = data.groupby("TypeCategory", observed=True)["Amount"].sum()
+    income_amount = type_sums.get("Income", 0)
+    expense_amount = type_sums.get("Expense", 0)
     balance = income_amount - expense_amount
 
 # Calculate key metrics once and reuse them
+# Amount is float64 with no gaps after prepare_transactions, so plain numpy reductions are safe
+amounts = data["Amount"].to_numpy()
 transaction_count = len(data)
-total_spent = data["Amount"].sum()
-avg_transaction = data["Amount"].mean() if transaction_count > 0 else 0
+total_spent = amounts.sum()
+avg_transaction = amounts.mean() if transaction_count > 0 else 0
+
+# Per-category totals, largest first, shared by the category metric, chart and recommendations
+category_sums = None
+if "Category" in data.columns and data["Category"].nunique() > 1:
+    category_sums = data.groupby("Category", observed=True)["Amount"].sum().sort_values(ascending=False, kind="stable")
+
+# Weekly totals keyed by the Monday each week starts on, shared by the consistency metric and the weekly chart
+weekly_totals = data.groupby(data["Date"].dt.to_period("W").dt.start_time)["Amount"].sum()
 
 # Display financial summary at the top
-if "Type" in data.columns and data["TypeCategory"].nunique() > 1 and "Income" in data["TypeCategory"].values:
+if "Type" in data.columns and len(type_sums) > 1 and "Income" in type_sums.index:
     st.markdown("### 💰 Financial Summary")
     col1, col2, col3 = st.columns(3)
     
@@ -205,8 +266,7 @@ else:
     with col2:
         st.markdown("### 🔍 Largest Transaction")
         if "Amount" in data.columns and not data.empty:
-            biggest_idx = data["Amount"].idxmax()
-            biggest = data.loc[biggest_idx]
+            biggest = data.iloc[amounts.argmax()]
             st.metric("Largest Amount", f"${biggest['Amount']:,.2f}")
             st.caption(f"Merchant: {biggest.get('Name', 'Unknown')} | Date: {biggest.get('Date', 'Unknown').strftime('%Y-%m-%d') if isinstance(biggest.get('Date', 'Unknown'), pd.Timestamp) else biggest.get('Date', 'Unknown')}")
     
@@ -214,9 +274,8 @@ else:
         st.markdown("### 📊 Transaction Overview")
         st.metric("Total Transactions", f"{transaction_count:,}")
         
-        if "Category" in data.columns and data["Category"].nunique() > 1:
-            category_count = data["Category"].nunique()
-            st.caption(f"Categories: {category_count} unique")
+        if category_sums is not None:
+            st.caption(f"Categories: {len(category_sums)} unique")
         else:
             st.caption("Add a 'Category' column to track spending categories")
 
@@ -226,14 +285,7 @@ col1, col2 = st.columns(2)
 with col1:
     if "Date" in data.columns and len(data) > 1:
         try:
-            # Change from daily to weekly spending consistency
-            # Group by week instead of by day for more stable consistency metrics
-            data['Week'] = data['Date'].dt.isocalendar().week
-            data['Year'] = data['Date'].dt.isocalendar().year
-            data['YearWeek'] = data['Year'].astype(str) + '-' + data['Week'].astype(str)
-            
-            weekly_totals = data.groupby('YearWeek')["Amount"].sum()
-            
+            # Weekly rather than daily totals give more stable consistency metrics
             if len(weekly_totals) > 1:
                 mean_spending = weekly_totals.mean()
                 std_spending = weekly_totals.std()
@@ -257,10 +309,9 @@ with col1:
         st.caption("Add more transactions with dates to see consistency metrics")
 
 with col2:
-    if "Category" in data.columns and data["Category"].nunique() > 1:
-        diversity = data["Category"].nunique()
-        top_category = data.groupby("Category")["Amount"].sum().idxmax()
-        top_category_percent = (data[data["Category"] == top_category]["Amount"].sum() / total_spent) * 100 if total_spent > 0 else 0
+    if category_sums is not None:
+        top_category = category_sums.index[0]
+        top_category_percent = (category_sums.iloc[0] / total_spent) * 100 if total_spent > 0 else 0
         
         st.metric("Top Category", f"{top_category}")
         st.caption(f"Represents {top_category_percent:.1f}% of your total spending")
@@ -276,35 +327,19 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 if "Date" in data.columns and not data.empty:
-    # Ensure we have week data
-    if 'Week' not in data.columns or 'Year' not in data.columns:
-        data_copy = data.copy()
-        data_copy.loc[:, 'Week'] = data_copy['Date'].dt.isocalendar().week
-        data_copy.loc[:, 'Year'] = data_copy['Date'].dt.isocalendar().year
-        data_copy.loc[:, 'YearWeek'] = data_copy['Year'].astype(str) + '-' + data_copy['Week'].astype(str)
-        data = data_copy
-    
-    # Group by week instead of day
-    weekly_totals = data.groupby(['Year', 'Week'])['Amount'].sum().reset_index()
-    
-    # Create a proper date field for the start of each week (for better plotting)
-    weekly_totals['WeekStart'] = weekly_totals.apply(
-        lambda x: datetime.strptime(f"{int(x['Year'])}-W{int(x['Week'])}-1", "%Y-W%W-%w"), 
-        axis=1
-    )
-    
     if len(weekly_totals) > 1:
-        # Create interactive plotly chart with tooltips
-        fig = px.line(
-            weekly_totals, 
-            x="WeekStart", 
-            y="Amount",
-            markers=True,
-            labels={"WeekStart": "Week Starting", "Amount": "Amount ($)"},
-            title="Weekly Spending Over Time"
-        )
+        # Create interactive plotly chart with tooltips; each week's start date is its x value
+        fig = go.Figure(go.Scatter(
+            x=weekly_totals.index.to_numpy(),
+            y=weekly_totals.to_numpy(),
+            mode="lines+markers",
+            line=dict(width=2),
+            marker=dict(size=8),
+            hovertemplate="<b>Week of:</b> %{x|%Y-%m-%d}<br><b>Amount:</b> $%{y:.2f}<extra></extra>"
+        ))
         
         fig.update_layout(
+            title="Weekly Spending Over Time",
             hovermode="x unified",
             hoverlabel=dict(
                 bgcolor="white",
@@ -317,12 +352,6 @@ if "Date" in data.columns and not data.empty:
             height=400
         )
         
-        fig.update_traces(
-            line=dict(width=2),
-            marker=dict(size=8),
-            hovertemplate="<b>Week of:</b> %{x|%Y-%m-%d}<br><b>Amount:</b> $%{y:.2f}<extra></extra>"
-        )
-        
         st.plotly_chart(fig, use_container_width=True)
         
         # Additional insights about the time series
@@ -340,74 +369,65 @@ else:
 # Smart Income/Expense Analysis - works even without an explicit Type column
 st.markdown("### 💸 Income vs Expenses")
 
-# First, try to categorize income vs expense intelligently based on amount values
-data_copy = data.copy()
-
 # If Type column already exists with proper values, use it
 has_valid_type = False
 income_amount = 0
 expense_amount = 0
 
-if "Type" in data.columns and "TypeCategory" in data.columns and "Income" in data["TypeCategory"].values:
+if "Type" in data.columns and "Income" in type_sums.index:
     has_valid_type = True
-    type_data = data.groupby("TypeCategory")["Amount"].sum().reset_index()
-    income_amount = type_data.loc[type_data["TypeCategory"] == "Income", "Amount"].sum()
-    expense_amount = type_data.loc[type_data["TypeCategory"] == "Expense", "Amount"].sum()
+    type_data = type_sums.reset_index()
+    income_amount = type_sums.get("Income", 0)
+    expense_amount = type_sums.get("Expense", 0)
 else:
     # No explicit income/expense labeling, so infer from data patterns
     # Positive values might be expenses, negative or very large positive might be income
     # Apply heuristics to identify likely income vs expense
+    # Work on a copy since the heuristic rewrites Amount
+    data_copy = data.copy()
     try:
-        # Sort by amount, descending
-        sorted_df = data_copy.sort_values("Amount", ascending=False).copy()
+        # Original amounts, kept for the fallback below after negatives are flipped
+        original_amounts = data_copy["Amount"]
         
         # Look at the distribution to identify potential income
-        q75 = sorted_df["Amount"].quantile(0.75)
-        q25 = sorted_df["Amount"].quantile(0.25)
+        q75, q25 = original_amounts.quantile([0.75, 0.25])
         iqr = q75 - q25
         upper_threshold = q75 + (1.5 * iqr)  # Use IQR method to find outliers
         
         # Assume the largest outliers might be income
-        potential_income = sorted_df[sorted_df["Amount"] > upper_threshold]
+        potential_income = original_amounts > upper_threshold
         
         # Also look for negative amounts which are often income
-        negative_amounts = sorted_df[sorted_df["Amount"] < 0]
+        negative_amounts = original_amounts < 0
         
-        # Create a TypeCategory column based on this analysis
-        data_copy.loc[:, "TypeCategory"] = "Expense"  # Default all to expense
+        # Create a TypeCategory column based on this analysis; everything else is an expense
+        data_copy["TypeCategory"] = np.where(potential_income | negative_amounts, "Income", "Expense")
         
-        # Mark potential income records
-        if not potential_income.empty:
-            for idx in potential_income.index:
-                data_copy.loc[idx, "TypeCategory"] = "Income"
-        
-        # Mark negative amounts as income (with absolute value)
-        if not negative_amounts.empty:
-            for idx in negative_amounts.index:
-                data_copy.loc[idx, "TypeCategory"] = "Income"
-                # Take absolute value for visualization
-                data_copy.loc[idx, "Amount"] = abs(data_copy.loc[idx, "Amount"])
+        # Take absolute value for visualization
+        data_copy["Amount"] = original_amounts.abs()
         
         # Calculate totals
-        type_data = data_copy.groupby("TypeCategory")["Amount"].sum().reset_index()
+        inferred_sums = data_copy.groupby("TypeCategory")["Amount"].sum()
         
         # Only if we have both types
-        if "Income" in type_data["TypeCategory"].values and "Expense" in type_data["TypeCategory"].values:
-            income_amount = type_data.loc[type_data["TypeCategory"] == "Income", "Amount"].sum()
-            expense_amount = type_data.loc[type_data["TypeCategory"] == "Expense", "Amount"].sum()
+        if "Income" in inferred_sums.index and "Expense" in inferred_sums.index:
+            type_data = inferred_sums.reset_index()
+            income_amount = inferred_sums["Income"]
+            expense_amount = inferred_sums["Expense"]
             has_valid_type = True
         else:
             # Try another approach - assume highest 10% of transactions might be income
             n_income = max(1, int(len(data_copy) * 0.1))
-            top_rows = sorted_df.head(n_income).index
+            top_rows = original_amounts.nlargest(n_income).index
             
             data_copy.loc[:, "TypeCategory"] = "Expense"  # Reset
             data_copy.loc[top_rows, "TypeCategory"] = "Income"
             
             # Recalculate
-            type_data = data_copy.groupby("TypeCategory")["Amount"].sum().reset_index()
-            income_amount = type_data.loc[type_data["TypeCategory"] == "Income", "Amount"].sum()
-            expense_amount = type_data.loc[type_data["TypeCategory"] == "Expense", "Amount"].sum()
+            inferred_sums = data_copy.groupby("TypeCategory")["Amount"].sum()
+            type_data = inferred_sums.reset_index()
+            income_amount = inferred_sums.get("Income", 0)
+            expense_amount = inferred_sums.get("Expense", 0)
             has_valid_type = True
     except Exception as e:
         st.caption(f"Error in income/expense analysis: {e}")
@@ -420,21 +440,15 @@ if has_valid_type:
     # Show the bar chart - removed the duplicate financial metrics here
     if len(type_data) > 1:
         st.subheader("Income vs Expense Breakdown")
-        fig = px.bar(
-            type_data, 
-            x="TypeCategory", 
-            y="Amount",
-            color="TypeCategory",
-            color_discrete_map={"Income": "#2E8B57", "Expense": "#CD5C5C"},
-            labels={"TypeCategory": "Type", "Amount": "Amount ($)"},
-            text_auto=True
-        )
-        
-        fig.update_traces(
+        type_labels = type_data["TypeCategory"].astype(str).to_numpy()
+        fig = go.Figure(go.Bar(
+            x=type_labels,
+            y=type_data["Amount"].to_numpy(),
+            marker_color=[TYPE_COLORS.get(label, "#636EFA") for label in type_labels],
             texttemplate='$%{y:,.2f}',
             textposition='inside',
             hovertemplate='<b>%{x}</b><br>Amount: $%{y:,.2f}<extra></extra>'
-        )
+        ))
         
         fig.update_layout(
             showlegend=False,
@@ -462,11 +476,10 @@ if has_valid_type:
 else:
     st.info("Not enough transaction data to determine income and expenses. Try adding more varied transaction amounts.")
 
-if "Category" in data.columns and data["Category"].nunique() > 1:
+if category_sums is not None:
     st.markdown("### 📈 Spending by Category")
     
-    category_data = data.groupby("Category")["Amount"].sum().reset_index().sort_values("Amount", ascending=False)
-    category_data = category_data[category_data["Amount"] > 0]
+    category_data = category_sums[category_sums > 0].reset_index()
     
     if not category_data.empty:
         st.subheader("🥧 Category Distribution")
@@ -477,28 +490,22 @@ if "Category" in data.columns and data["Category"].nunique() > 1:
             if others_sum > 0:
                 top_5 = pd.concat([top_5, pd.DataFrame({"Category": ["Others"], "Amount": [others_sum]})])
             
-            pie_data = top_5.copy()
+            pie_data = top_5
             title = "Top 5 Categories Distribution"
         else:
-            pie_data = category_data.copy()
+            pie_data = category_data
             title = "Category Distribution"
         
-        fig = px.pie(
-            pie_data, 
-            names='Category', 
-            values='Amount',
-            title=title,
+        fig = go.Figure(go.Pie(
+            labels=pie_data["Category"].to_numpy(),
+            values=pie_data["Amount"].to_numpy(),
             hole=0.3,
-            color_discrete_sequence=px.colors.qualitative.Plotly
-        )
-        
-        fig.update_traces(
             textinfo='none',
-            hoverinfo='label+percent+value',
             hovertemplate='<b>%{label}</b><br>Amount: $%{value:.2f}<br>Percentage: %{percent}<extra></extra>'
-        )
+        ))
         
         fig.update_layout(
+            title=title,
             legend=dict(
                 orientation="v",
                 yanchor="middle",
@@ -513,26 +520,27 @@ if "Category" in data.columns and data["Category"].nunique() > 1:
         st.write("")
         
         st.subheader("📊 Category Breakdown (Bar Chart)")
-        fig_bar, ax_bar = plt.subplots(figsize=(10, 6))
-        plot_data = category_data.head(10) if len(category_data) > 10 else category_data
-        
-        if not plot_data.empty:
-            bars = sns.barplot(x="Amount", y="Category", data=plot_data, ax=ax_bar)
-            ax_bar.set_xlabel("Amount ($)", fontsize=12)
-            ax_bar.set_ylabel("Category", fontsize=12)
-            ax_bar.tick_params(labelsize=10)
-            
-            for i, bar in enumerate(bars.patches):
-                width = bar.get_width()
-                ax_bar.text(width + 5, bar.get_y() + bar.get_height()/2, 
-                          f"${width:,.2f}", ha='left', va='center', fontsize=10)
-                
-            ax_bar.set_title("Spending by Category", fontsize=14)
-        else:
-            ax_bar.text(0.5, 0.5, 'No positive data to plot', ha='center', va='center')
-            ax_bar.axis('off')
-            
-        st.pyplot(fig_bar)
+        plot_data = category_data.head(10)
+        
+        fig_bar = go.Figure(go.Bar(
+            x=plot_data["Amount"].to_numpy(),
+            y=plot_data["Category"].to_numpy(),
+            orientation="h",
+            texttemplate='$%{x:,.2f}',
+            textposition='outside',
+            hovertemplate='<b>%{y}</b><br>Amount: $%{x:,.2f}<extra></extra>'
+        ))
+        
+        # Largest category on top, matching the order of category_data
+        fig_bar.update_layout(
+            title="Spending by Category",
+            xaxis_title="Amount ($)",
+            yaxis_title="Category",
+            yaxis=dict(autorange="reversed"),
+            plot_bgcolor="white"
+        )
+        
+        st.plotly_chart(fig_bar, use_container_width=True)
         
         if len(category_data) > 10:
             st.caption("Showing top 10 categories by amount")
@@ -545,14 +553,13 @@ st.markdown("### 🧠 Smart Insights")
 
 insights = []
 
-if "Category" in data.columns and "Date" in data.columns and data["Category"].nunique() > 1:
+if category_sums is not None and "Date" in data.columns:
     try:
-        # Create a copy before modifying to avoid SettingWithCopyWarning
-        insights_data = data.copy()
-        insights_data.loc[:, "Month"] = insights_data["Date"].dt.to_period("M")
+        # Integer month ids (year * 12 + month) group faster than Period objects
+        month_ids = data["Date"].dt.year * 12 + data["Date"].dt.month
         
-        category_frequency = insights_data.groupby("Category")["Month"].nunique()
-        consistent_categories = category_frequency[category_frequency > 1].index.tolist()
+        category_frequency = month_ids.groupby(data["Category"], observed=True).nunique()
+        consistent_categories = category_frequency.index[category_frequency.to_numpy() > 1].tolist()
         
         if consistent_categories:
             insights.append(f"🔄 You consistently spend on {', '.join(consistent_categories[:3])}{'...' if len(consistent_categories) > 3 else ''}")
@@ -561,27 +568,20 @@ if "Category" in data.columns and "Date" in data.columns and data["Category"].nu
 
 if "Amount" in data.columns and len(data) > 5:
     try:
-        mean_amount = data["Amount"].mean()
-        std_amount = data["Amount"].std()
-        threshold = mean_amount + (2 * std_amount)
+        threshold = avg_transaction + (2 * amounts.std(ddof=1))
         
-        unusual = data[data["Amount"] > threshold]
-        if not unusual.empty:
-            unusual_count = len(unusual)
+        unusual_count = int((amounts > threshold).sum())
+        if unusual_count:
             insights.append(f"⚠️ Found {unusual_count} unusually large transactions (>${threshold:.2f}+)")
     except:
         pass
 
 if "Date" in data.columns and "Amount" in data.columns and len(data) > 10:
     try:
-        analysis_data = data.copy()
-        analysis_data = analysis_data.sort_values("Date")
-        half_point = len(analysis_data) // 2
-        first_half = analysis_data.iloc[:half_point]
-        second_half = analysis_data.iloc[half_point:]
-        
-        first_total = first_half["Amount"].sum()
-        second_total = second_half["Amount"].sum()
+        # Split at the median date rather than sorting; same-day transactions stay together
+        median_date = data["Date"].quantile(0.5)
+        first_total = data.loc[data["Date"] < median_date, "Amount"].sum()
+        second_total = data.loc[data["Date"] >= median_date, "Amount"].sum()
         
         change_pct = ((second_total - first_total) / first_total) * 100 if first_total > 0 else 0
         
@@ -603,8 +603,8 @@ recommendations = []
 
 recommendations.append("🔍 Categorize all transactions to get better insights")
 
-if "Category" in data.columns and data["Category"].nunique() > 1:
-    top_category = data.groupby("Category")["Amount"].sum().idxmax()
+if category_sums is not None:
+    top_category = category_sums.index[0]
     recommendations.append(f"💰 Consider setting a budget for your highest spend category: {top_category}")
 
 if "Date" in data.columns and len(data) > 10:
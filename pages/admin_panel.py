@@ -16,6 +16,9 @@ from datetime import datetime, timedelta, timezone
 import json
 import os
 import altair as alt
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils import get_user_file
 
 logging.basicConfig(
     filename="admin_actions.log",
@@ -62,6 +65,17 @@ def calculate_data_completeness(users):
 
     complete_users = 0
     for username, user_data in users.items():
+        parquet_file = get_user_file(username)
+        if parquet_file.exists():
+            try:
+                # Only the footer is read; every row shares the same columns
+                metadata = pq.read_metadata(parquet_file)
+                if metadata.num_rows > 0 and {"Category", "Amount", "Date"} <= set(metadata.schema.names):
+                    complete_users += 1
+            except (OSError, pa.ArrowInvalid):
+                pass
+            continue
+        
         user_file = os.path.join("user_data", f"{username}.json")
         if os.path.exists(user_file):
             try:
@@ -85,7 +85,7 @@ def main():
             all_clean = False
     
     # Check for user data files that shouldn't be committed
-    user_data_files = list(base_dir.glob("user_data/*.json"))
+    user_data_files = list(base_dir.glob("user_data/*.json")) + list(base_dir.glob("user_data/*.parquet"))
     if user_data_files:
         print(f"❌ Found {len(user_data_files)} user data files that should not be committed.")
         for file in user_data_files[:5]:  # Show first 5 as examples
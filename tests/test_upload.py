@@ -0,0 +1,137 @@
+import importlib.util
+import io
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+PAGE_FILE = Path(__file__).resolve().parent.parent / "pages" / "1_Upload.py"
+
+@pytest.fixture(scope="module")
+def upload_page(tmp_path_factory):
+    """Import the Upload page as a module, logged in and writing its log file to a temporary directory."""
+    st.session_state["authenticated"] = True
+    st.session_state["user"] = "test_user"
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(tmp_path_factory.mktemp("upload"))
+        spec = importlib.util.spec_from_file_location("upload_page", PAGE_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+def make_pdf(pages):
+    """Build a minimal PDF with one page per list of text lines."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        text = " ".join(f"({line}) Tj 0 -14 Td" for line in lines)
+        stream = f"BT /F1 10 Tf 40 800 Td {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+    
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return pdf
+
+def test_parse_statement_lines_without_amounts(upload_page):
+    transactions, errors = upload_page.parse_statement_lines(["Terms and conditions apply. See website."], "2024-02-01")
+    assert transactions.empty
+    assert errors == []
+
+def test_parse_statement_lines_mixed_amounts(upload_page):
+    transactions, errors = upload_page.parse_statement_lines([
+        "Terms and conditions apply. See website.",
+        "2024-01-05 Grocery Store 1,234.56",
+        "Statement period ends on the 31st. Thank you.",
+        "2024-01-06 Salary deposit 2,000.00",
+        "Interest paid 1.25",
+    ], "2024-02-01")
+    assert errors == []
+    assert list(transactions["Name"]) == ["2024-01-05 Grocery Store", "2024-01-06 Salary deposit", "Interest paid"]
+    assert list(transactions["Amount"]) == [1234.56, 2000.0, 1.25]
+    assert list(transactions["Type"]) == ["Expense", "Income", "Expense"]
+    assert list(transactions["Date"]) == ["2024-01-05", "2024-01-06", "2024-02-01"]
+
+def test_parse_pdf_text_keeps_rows_around_chunks_without_amounts(upload_page, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    monkeypatch.setattr(upload_page, "PDF_PAGES_PER_CHUNK", 1)
+    pdf_bytes = make_pdf([
+        ["2024-01-05 Grocery Store 1,234.56"],
+        ["Terms and conditions apply. See website."],
+        ["2024-01-06 Salary deposit 2,000.00"],
+    ])
+    transactions, errors, has_text = upload_page.parse_pdf_text(pdf_bytes, "2024-02-01")
+    assert has_text
+    assert errors == []
+    assert list(transactions["Amount"]) == [1234.56, 2000.0]
+
+def test_to_csv_bytes_round_trips_like_to_csv(upload_page):
+    data = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-05", None]),
+        "Name": ["Coffee, large", 'The "Deli"'],
+        "Amount": [-2.0, np.nan],
+        "Count": [1, 2],
+        "Recurring": [True, False],
+    })
+    pd.testing.assert_frame_equal(
+        pd.read_csv(io.BytesIO(upload_page.to_csv_bytes(data))),
+        pd.read_csv(io.StringIO(data.to_csv(index=False))),
+    )
+
+def test_read_csv_fast_names_blank_headers_like_c_parser(upload_page):
+    data = upload_page.read_csv_fast(io.BytesIO(b",,\n1,2,3\n"))
+    assert list(data.columns) == ["Unnamed: 0", "Unnamed: 1", "Unnamed: 2"]
+    assert list(upload_page.read_csv_fast(io.BytesIO(b"a,a,\n1,2,3\n")).columns) == ["a", "a.1", "Unnamed: 2"]
+    
+    standardized = upload_page.standardize_transactions(data)
+    assert list(standardized.columns[:3]) == ["col_0", "col_1", "col_2"]
+    assert standardized.loc[0, ["col_0", "col_1", "col_2"]].tolist() == [1, 2, 3]
+
+def test_read_json_fast_reads_column_dicts(upload_page):
+    data = upload_page.read_json_fast(io.BytesIO(b'{"Name": ["a", "b"], "Amount": [1, 2]}'))
+    assert list(data["Name"]) == ["a", "b"]
+    assert list(data["Amount"]) == [1, 2]
+    
+    records = upload_page.read_json_fast(io.BytesIO(b'{"Name": "a", "Amount": 1}\n{"Name": "b", "Amount": 2}\n'))
+    assert list(records["Name"]) == ["a", "b"]
+
+def test_process_uploaded_file_keeps_integer_amounts_float64(upload_page):
+    uploaded_file = io.BytesIO(b"Name,Amount,Count\nRent,-128,1\nCoffee,5,2\n")
+    uploaded_file.name = "transactions.csv"
+    data = upload_page.process_uploaded_file(uploaded_file)
+    assert data["Amount"].dtype == "float64"
+    assert sorted(data["Amount"]) == [-128.0, 5.0]
+    assert data["count"].dtype == "int8"
+
+def test_get_export_data_builds_only_when_called(upload_page, monkeypatch):
+    calls = []
+    monkeypatch.setitem(upload_page.EXPORT_WRITERS, "CSV", lambda data: calls.append(len(data)) or b"csv")
+    data = pd.DataFrame({"Date": ["2024-01-05"], "Name": ["Rent"], "Amount": [-900.0], "Category": ["Housing"]})
+    st.session_state.pop("_export_bytes", None)
+    
+    build, built = upload_page.get_export_data(data, "CSV")
+    assert not built and calls == []
+    assert build() == b"csv" and build() == b"csv"
+    assert calls == [1]
+    assert upload_page.get_export_data(data, "CSV")[1]
+
+def test_detect_duplicate_transactions_with_missing_name(upload_page):
+    pytest.importorskip("rapidfuzz")
+    data = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-05", "2024-01-05", "2024-01-06"]),
+        "Name": ["Coffee Shop", "Coffee Shop", None],
+        "Amount": [4.5, 4.5, 4.5],
+    })
+    duplicates = upload_page.detect_duplicate_transactions(data)
+    assert len(duplicates) == 1
@@ -1,6 +1,13 @@
 import pytest
 import pandas as pd
-from utils import load_user_data, save_user_data, get_user_file
+import utils
+from utils import load_user_data, save_user_data, get_user_file, get_legacy_user_file
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Keep each test's user files in its own temporary directory."""
+    monkeypatch.setattr(utils, "DATA_DIR", tmp_path)
+    return tmp_path
 
 @pytest.fixture
 def sample_data():
@@ -20,3 +27,15 @@ def test_load_user_data_empty():
     data = load_user_data(username)
     assert data.empty
     assert list(data.columns) == ["Date", "Name", "Amount", "Category"]
+
+def test_load_user_data_migrates_legacy_json(sample_data):
+    username = "legacy_user"
+    legacy_file = get_legacy_user_file(username)
+    sample_data.to_json(legacy_file, orient="records")
+    assert not get_user_file(username).exists()
+    loaded_data = load_user_data(username)
+    assert get_user_file(username).exists()
+    assert not legacy_file.exists()
+    assert legacy_file.with_suffix(".json.bak").exists()
+    assert list(loaded_data["Name"]) == ["Test", "Sample"]
+    assert loaded_data["Amount"].sum() == 300.0
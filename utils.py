@@ -5,7 +5,9 @@ Manages loading, saving, validating, and processing user financial data.
 import os
 import json
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from json import JSONDecodeError  # Add this import for JSON error handling
+import numpy as np
 import pandas as pd
 from jsonschema import validate, ValidationError  # Removed unused imports like dotenv
 from filelock import FileLock  # Add this import for file locking
@@ -15,6 +17,9 @@ from pathlib import Path  # Use pathlib for cross-platform file handling
 
 DATA_DIR = Path("user_data")  # Updated to use pathlib
 
+# Frames with at least this many rows strip their Arrow-backed text columns on a thread pool
+PARALLEL_STRIP_ROWS = 100_000
+
 # Fixed schema to expect objects instead of arrays
 DATA_SCHEMA = {
     "type": "object",
@@ -37,7 +42,50 @@ def get_user_file(email):
     """
     DATA_DIR.mkdir(exist_ok=True)  # Create directory if it doesn't exist
     sanitized_email = email.replace("@", "_at_").replace(".", "_dot_")  # Sanitize for filenames
-    return DATA_DIR / f"{sanitized_email}.json"
+    return DATA_DIR / f"{sanitized_email}.parquet"
+
+def get_legacy_user_file(email):
+    """
+    Get the path of a user's transaction data in the old JSON format.
+    Only used to migrate existing data to Parquet.
+    
+    Args:
+        email (str): Email address of the user to identify the file
+    """
+    return get_user_file(email).with_suffix(".json")
+
+def migrate_legacy_user_file(email):
+    """
+    Convert a user's legacy JSON data file to Parquet, once.
+    Does nothing if the Parquet file already exists or there is no JSON file.
+    The JSON file is kept as a backup with a .bak suffix once the Parquet file is written.
+    
+    Args:
+        email (str): Email address of the user
+    """
+    file_path = get_user_file(email)
+    legacy_path = get_legacy_user_file(email)
+    if file_path.exists() or not legacy_path.exists():
+        return
+    with legacy_path.open("r") as f:
+        data = json.load(f)
+    validate_user_data(data)
+    write_user_frame(pd.DataFrame(data), file_path)
+    legacy_path.rename(legacy_path.with_suffix(".json.bak"))
+
+def write_user_frame(df, file_path):
+    """
+    Write a transaction DataFrame to Parquet with Zstandard compression.
+    Columns that mix value types are stored as strings so Arrow can encode them.
+    
+    Args:
+        df (DataFrame): Transaction data with dates already converted to strings
+        file_path (Path or file-like): Destination file
+    """
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df.to_parquet(file_path, engine="pyarrow", compression="zstd", index=False)
 
 def validate_rows(data, schema=DATA_SCHEMA):
     """
@@ -83,52 +131,139 @@ def validate_user_data(data, existing_data=None):
         error_messages = "\n".join([f"Row {index}: {message}" for index, message in invalid_rows])
         raise ValueError(f"Invalid data format:\n{error_messages}")
 
+def fillna_text(series, value):
+    """
+    Fill missing values in a text column, including categorical ones.
+    Categorical columns get the fill value added as a category first, since pandas rejects unknown values.
+    
+    Args:
+        series (Series): Text or categorical column
+        value (str): Replacement for missing values
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if not series.hasnans:
+            return series
+        if value not in series.cat.categories:
+            series = series.cat.add_categories(value)
+    return series.fillna(value)
+
 def filter_and_clean_data(data):
     """
     Prepare data for export by cleaning and standardizing formats.
     Handles missing values, string trimming, and numeric conversions.
     """
-    data = data.copy()
+    # Shallow copy: the columns below are replaced, not written into, so the caller's frame is untouched
+    data = data.copy(deep=False)
 
     # Fill missing values with defaults
     data["Date"] = data["Date"].fillna("Unknown")
-    data["Name"] = data["Name"].fillna("Unknown")
+    data["Name"] = fillna_text(data["Name"], "Unknown")
     data["Amount"] = data["Amount"].fillna(0.0)
-    data["Category"] = data["Category"].fillna("Uncategorized")
+    data["Category"] = fillna_text(data["Category"], "Uncategorized")
 
-    # Clean string values by stripping whitespace
-    for col in data.select_dtypes(include=["object"]).columns:
-        if hasattr(data[col], "str") and hasattr(data[col].str, "strip"):
-            data[col] = data[col].str.strip()
+    # Clean string values by stripping whitespace; object columns holding anything but strings are left alone
+    text_cols = [
+        col for col in data.select_dtypes(include=["object", "string"]).columns
+        if data[col].dtype != object or pd.api.types.infer_dtype(data[col], skipna=True) == "string"
+    ]
+    # Only Arrow-backed columns go to the thread pool: Arrow's strip kernel releases the GIL,
+    # while object columns strip in Python and would just take turns holding it
+    arrow_cols = [col for col in text_cols if getattr(data[col].dtype, "storage", None) == "pyarrow"]
+    if len(arrow_cols) > 1 and len(data) >= PARALLEL_STRIP_ROWS:
+        with ThreadPoolExecutor() as executor:
+            stripped = list(executor.map(lambda col: data[col].str.strip(), arrow_cols))
+        data[arrow_cols] = pd.concat(stripped, axis=1)
+        text_cols = [col for col in text_cols if col not in arrow_cols]
+    if text_cols:
+        data[text_cols] = data[text_cols].apply(lambda column: column.str.strip())
 
-    # Convert numeric columns to proper numeric format
-    for col in data.select_dtypes(include=["float", "int"]).columns:
-        data[col] = pd.to_numeric(data[col], errors="coerce").fillna(0.0)
+    # Numeric columns are already numeric; only the ones with missing values need filling
+    numeric = data.select_dtypes(include=["float", "int"])
+    numeric_cols = numeric.columns[numeric.isna().any().to_numpy()]
+    if len(numeric_cols):
+        data[numeric_cols] = data[numeric_cols].fillna(0.0)
 
     return data
 
+def _rows_not_in(df, existing):
+    """
+    Rows of df that don't appear in existing, found by comparing row hashes.
+    If the two frames have different columns, every row counts as new.
+    
+    Args:
+        df (DataFrame): Data about to be saved
+        existing (DataFrame): Data already on disk
+    
+    Returns:
+        DataFrame: The new or changed rows of df
+    """
+    if set(existing.columns) != set(df.columns):
+        return df
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    existing_hashes = pd.util.hash_pandas_object(existing[df.columns], index=False)
+    return df[~row_hashes.isin(existing_hashes).to_numpy()]
+
+def _rows_needing_validation(df, schema=DATA_SCHEMA):
+    """
+    Boolean mask of the rows a vectorized type check can't clear, so they still go through jsonschema.
+    A column whose dtype already guarantees its schema type only flags its missing values;
+    any other column flags every row.
+    
+    Args:
+        df (DataFrame): Data about to be validated, with dates already converted to strings
+        schema (dict): JSON schema with a type for each column
+    
+    Returns:
+        ndarray: True for rows that need full schema validation
+    """
+    needs_check = np.zeros(len(df), dtype=bool)
+    for name, rules in schema["properties"].items():
+        if name not in df.columns:
+            # validate_user_data fills it with a valid default
+            continue
+        column = df[name]
+        if rules["type"] == "number":
+            # NumPy floats (NaN included) and integers all pass as JSON numbers
+            if isinstance(column.dtype, np.dtype) and column.dtype.kind in "fiu":
+                continue
+        elif rules["type"] == "string":
+            values = column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype) else column
+            if isinstance(values.dtype, pd.StringDtype) or pd.api.types.infer_dtype(values, skipna=True) == "string":
+                needs_check |= column.isna().to_numpy()
+                continue
+        needs_check[:] = True
+        break
+    return needs_check
+
+@st.cache_data(show_spinner=False)
+def _read_user_frame(file_path, modified_time):
+    """
+    Read a user's Parquet file and parse its dates.
+    Cached on the path and modification time so reruns skip the disk until the file changes.
+    """
+    df = pd.read_parquet(file_path, engine="pyarrow")
+    
+    # Convert date strings back to datetime objects
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    
+    return df
+
 def load_user_data(email):
     """
-    Load a user's transaction data from their JSON file.
+    Load a user's transaction data from their Parquet file.
+    Legacy JSON data is converted to Parquet on first load.
     
     Args:
         email (str): Email address of the user
     """
     file_path = get_user_file(email)
     try:
+        migrate_legacy_user_file(email)
         if file_path.exists():
-            with file_path.open("r") as f:
-                data = json.load(f)
-                validate_user_data(data)
-                df = pd.DataFrame(data)
-                
-                # Convert date strings back to datetime objects
-                if 'Date' in df.columns:
-                    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-                
-                return df
+            return _read_user_frame(str(file_path), file_path.stat().st_mtime_ns)
         return pd.DataFrame(columns=["Date", "Name", "Amount", "Category"])
-    except (json.JSONDecodeError, ValidationError) as e:
+    except (json.JSONDecodeError, ValidationError, ValueError) as e:
         st.error(f"Error loading user data: {e}")
         return pd.DataFrame(columns=["Date", "Name", "Amount", "Category"])
     except FileNotFoundError:
@@ -139,7 +274,7 @@ def load_user_data(email):
 
 def save_user_data(email, df, metadata=None):
     """
-    Save a user's transaction data to their JSON file.
+    Save a user's transaction data to their Parquet file.
     Handles datetime conversions, validates data, and prevents race conditions.
     
     Args:
@@ -151,30 +286,34 @@ def save_user_data(email, df, metadata=None):
     lock_path = f"{file_path}.lock"
     
     # Create metadata file path
-    metadata_file = DATA_DIR / f"{email}_metadata.json"
+    metadata_file = get_metadata_file(email)
     
     try:
         with FileLock(lock_path):
             # Create the data directory if it doesn't exist
             DATA_DIR.mkdir(exist_ok=True)
             
-            df_copy = df.copy()
+            # Shallow copy: columns are only replaced below, so the caller's frame keeps its dtypes
+            df_copy = df.copy(deep=False)
             # Convert datetime columns to strings
             for col in df_copy.select_dtypes(include=['datetime64']).columns:
                 df_copy[col] = df_copy[col].dt.strftime('%Y-%m-%d %H:%M:%S')
 
-            # Handle native date types
-            for col in df_copy.columns:
-                df_copy[col] = df_copy[col].apply(lambda x: x.strftime('%Y-%m-%d') if isinstance(x, datetime.date) else x)
+            # Handle native date types left in text columns
+            for col in df_copy.select_dtypes(include=["object", "string"]).columns:
+                kind = pd.api.types.infer_dtype(df_copy[col], skipna=True)
+                if kind in ("date", "datetime"):
+                    df_copy[col] = pd.to_datetime(df_copy[col]).dt.strftime('%Y-%m-%d')
+                elif kind.startswith("mixed"):
+                    df_copy[col] = df_copy[col].map(lambda x: x.strftime('%Y-%m-%d') if isinstance(x, datetime.date) else x)
 
-            data = df_copy.to_dict(orient="records")
-            existing_data = []
+            # Only rows that aren't already saved need validating
+            new_rows = df_copy
             if file_path.exists():
-                with file_path.open("r") as f:
-                    existing_data = json.load(f)
-            validate_user_data(data, existing_data)
-            with file_path.open("w") as f:
-                json.dump(data, f, indent=4)
+                new_rows = _rows_not_in(df_copy, pd.read_parquet(file_path, engine="pyarrow"))
+            new_rows = new_rows[_rows_needing_validation(new_rows)]
+            validate_user_data(new_rows.to_dict(orient="records"))
+            write_user_frame(df_copy, file_path)
                 
             # Save metadata separately
             if metadata:
@@ -185,6 +324,61 @@ def save_user_data(email, df, metadata=None):
     except Exception as e:
         raise RuntimeError(f"Unexpected error while saving user data: {e}")
 
+def get_metadata_file(email):
+    """
+    Get the file path for a user's upload metadata.
+    
+    Args:
+        email (str): Email address of the user
+    """
+    return DATA_DIR / f"{email}_metadata.json"
+
+@st.cache_data(show_spinner=False)
+def _read_metadata(file_path, modified_time):
+    """Parse a metadata file. Cached on the path and modification time."""
+    with open(file_path, "r") as f:
+        return json.load(f)
+
+def restore_upload_metadata(email):
+    """
+    Copy a user's saved upload metadata into session state.
+    Done once per user per session; later reruns skip the file entirely.
+    
+    Args:
+        email (str): Email address of the user
+    
+    Returns:
+        bool: True if saved metadata was found
+    """
+    if st.session_state.get("_metadata_loaded") == email:
+        return True
+    
+    metadata_file = get_metadata_file(email)
+    if not metadata_file.exists():
+        return False
+    
+    metadata = _read_metadata(str(metadata_file), metadata_file.stat().st_mtime_ns)
+    # Store relevant metadata in session state
+    if "last_upload_filename" in metadata:
+        st.session_state["uploaded_file_name"] = metadata["last_upload_filename"]
+    if "last_upload_timestamp" in metadata:
+        st.session_state["upload_timestamp"] = metadata["last_upload_timestamp"]
+    if "upload_history" in metadata:
+        st.session_state["upload_history"] = list(metadata["upload_history"])
+    st.session_state["_metadata_loaded"] = email
+    return True
+
+def set_transactions(data):
+    """
+    Store transaction data in session state and bump its version.
+    The version lets per-session summaries be reused until the data actually changes.
+    
+    Args:
+        data (DataFrame): Transaction data
+    """
+    st.session_state["transactions"] = data
+    st.session_state["transactions_version"] = st.session_state.get("transactions_version", 0) + 1
+
 def get_transactions():
     """
     Fetch transaction data reliably from session state or load it from the user's data file.
@@ -209,20 +403,10 @@ def get_transactions():
         
         # If data was found, store it in session state for future access
         if not data.empty:
-            st.session_state["transactions"] = data.copy()
+            set_transactions(data)
             
             # Also load metadata
-            metadata_file = DATA_DIR / f"{username}_metadata.json"
-            if metadata_file.exists():
-                with metadata_file.open("r") as f:
-                    metadata = json.load(f)
-                    # Store relevant metadata in session state
-                    if "last_upload_filename" in metadata:
-                        st.session_state["uploaded_file_name"] = metadata["last_upload_filename"]
-                    if "last_upload_timestamp" in metadata:
-                        st.session_state["upload_timestamp"] = metadata["last_upload_timestamp"]
-                    if "upload_history" in metadata:
-                        st.session_state["upload_history"] = metadata["upload_history"]
+            restore_upload_metadata(username)
         
         return data
     except Exception as e: